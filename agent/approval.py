@@ -0,0 +1,185 @@
+import json
+import re
+from dataclasses import dataclass
+from enum import Enum
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Optional
+from urllib.parse import urlsplit
+
+from agent.navigator.actions.structures import ActionRisk, ActionType
+from models import Approval
+
+if TYPE_CHECKING:
+    from agent.extractor.structures import PageSnapshot
+    from agent.navigator.actions import Action
+    from agent.navigator.actions.risk import RiskEngine
+
+
+APPROVAL_POLICY_VERSION = 1
+
+_RISK_ORDER = {ActionRisk.safe: 0, ActionRisk.confirm: 1, ActionRisk.destructive: 2}
+
+
+class Confirmation(str, Enum):
+    """Решение пользователя по действию, требующему подтверждения"""
+    approve = "approve"
+    decline = "decline"
+    always = "always"  # одобрить и запомнить для этого сайта
+
+
+@dataclass(frozen=True)
+class ApprovalKey:
+    """Ключ одобрения: домен, тип действия и нормализованный контекст элемента"""
+    domain: str
+    action_type: str
+    context: str
+
+    @staticmethod
+    def for_action(action: 'Action', snapshot: Optional['PageSnapshot'], engine: 'RiskEngine') -> 'ApprovalKey':
+        url = snapshot.url if snapshot else ""
+        return ApprovalKey(
+            domain=(urlsplit(url).hostname or "").lower(),
+            action_type=action.action_type.value,
+            context=engine.element_context(snapshot, action.selector),
+        )
+
+    @property
+    def rememberable(self) -> bool:
+        """Одобрение можно запомнить, только если известны сайт и элемент"""
+
+        return bool(self.domain and self.context)
+
+
+def _domain_matches(host: str, domains: tuple[str, ...]) -> bool:
+    return any(domain == "*" or host == domain or host.endswith(f".{domain}") for domain in domains)
+
+
+@dataclass(frozen=True)
+class ApprovalRule:
+    """
+    Правило заранее одобренных действий.
+
+    Подходит, если домен совпадает с одним из domains ("*" — любой), тип действия входит
+    в actions (пусто — любой), контекст элемента подходит под регулярное выражение context
+    и риск действия не выше max_risk.
+    """
+    domains: tuple[str, ...]
+    actions: tuple[str, ...] = ()
+    context: Optional[re.Pattern] = None
+    max_risk: ActionRisk = ActionRisk.confirm
+
+    def allows(self, key: ApprovalKey, risk: ActionRisk) -> bool:
+        if _RISK_ORDER[risk] > _RISK_ORDER[self.max_risk]:
+            return False
+        if not _domain_matches(key.domain, self.domains):
+            return False
+        if self.actions and key.action_type not in self.actions:
+            return False
+        if self.context is not None and not self.context.search(key.context):
+            return False
+        return True
+
+
+@dataclass(frozen=True)
+class ApprovalPolicy:
+    """
+    Файл политики одобрений для запусков без участия пользователя (JSON).
+
+    Формат:
+    {"version": 1, "rules": [{"domains": ["shop.example.com"], "actions": ["click"],
+                              "context": "add to cart|checkout", "max_risk": "confirm"}]}
+    """
+    rules: tuple[ApprovalRule, ...]
+
+    @staticmethod
+    def load(path: Path) -> 'ApprovalPolicy':
+        try:
+            data = json.loads(Path(path).read_text(encoding="utf-8"))
+        except (OSError, ValueError) as e:
+            raise ValueError(f"Cannot read approval policy from {path}: {e}") from e
+        return ApprovalPolicy.from_dict(data)
+
+    @staticmethod
+    def from_dict(data: dict[str, Any]) -> 'ApprovalPolicy':
+        version = data.get("version")
+        if version != APPROVAL_POLICY_VERSION:
+            raise ValueError(f"Unsupported approval policy version: {version!r} (expected {APPROVAL_POLICY_VERSION})")
+
+        rules = []
+        for i, item in enumerate(data.get("rules", [])):
+            domains = tuple(domain.lower().lstrip(".") for domain in item.get("domains", []))
+            if not domains:
+                raise ValueError(f'rule {i}: "domains" is required (use "*" for any site)')
+
+            actions = tuple(item.get("actions", []))
+            for action in actions:
+                ActionType(action)
+
+            context = item.get("context")
+            rules.append(ApprovalRule(
+                domains=domains,
+                actions=actions,
+                context=re.compile(context, re.IGNORECASE) if context else None,
+                max_risk=ActionRisk(item.get("max_risk", ActionRisk.confirm.value)),
+            ))
+        return ApprovalPolicy(rules=tuple(rules))
+
+    def allows(self, key: ApprovalKey, risk: ActionRisk) -> bool:
+        return any(rule.allows(key, risk) for rule in self.rules)
+
+
+class ApprovalCache:
+    """
+    Кэш одобренных действий.
+
+    Действие одобрено, если оно подходит под политику (policy) или пользователь ранее
+    ответил «всегда на этом сайте» для того же типа действия и контекста элемента
+    с риском не ниже текущего: если после обновления правил риска элемент стал опаснее,
+    запомненное одобрение на него не распространяется.
+    Запомненные одобрения хранятся в БД (models.Approval) и загружаются один раз на домен.
+    """
+    def __init__(self, policy: Optional[ApprovalPolicy] = None):
+        self.policy = policy
+        self._approved: dict[str, dict[tuple[str, str], ActionRisk]] = {}
+
+    async def is_approved(self, key: ApprovalKey, risk: ActionRisk) -> bool:
+        if self.policy is not None and self.policy.allows(key, risk):
+            return True
+        if not key.rememberable:
+            return False
+
+        approved = (await self._domain_approvals(key.domain)).get((key.action_type, key.context))
+        return approved is not None and _RISK_ORDER[risk] <= _RISK_ORDER[approved]
+
+    async def remember(self, key: ApprovalKey, risk: ActionRisk) -> None:
+        """Запоминает одобрение для сайта на уровне риска risk"""
+
+        if not key.rememberable:
+            return
+
+        approved = await self._domain_approvals(key.domain)
+        previous = approved.get((key.action_type, key.context))
+        if previous is not None and _RISK_ORDER[previous] >= _RISK_ORDER[risk]:
+            return
+
+        approved[(key.action_type, key.context)] = risk
+        if previous is not None:
+            await Approval.objects.filter(
+                domain=key.domain, action_type=key.action_type, context=key.context,
+            ).update(risk=risk.value)
+        else:
+            await Approval(
+                domain=key.domain, action_type=key.action_type, context=key.context, risk=risk.value,
+            ).save()
+
+    async def _domain_approvals(self, domain: str) -> dict[tuple[str, str], ActionRisk]:
+        approved = self._approved.get(domain)
+        if approved is None:
+            rows = await Approval.objects.filter(domain=domain).values_list("action_type", "context", "risk").all()
+            approved = self._approved[domain] = {}
+            for action_type, context, risk in rows:
+                previous = approved.get((action_type, context))
+                risk = ActionRisk(risk)
+                if previous is None or _RISK_ORDER[risk] > _RISK_ORDER[previous]:
+                    approved[(action_type, context)] = risk
+        return approved
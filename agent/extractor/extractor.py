@@ -1,173 +1,182 @@
-from typing import TYPE_CHECKING, Optional
+import asyncio
+from dataclasses import replace
+from typing import TYPE_CHECKING, Any, Optional
 
-from agent.extractor.policy.base import apply_policy
-from agent.extractor.structures import PageSnapshot, LinkInfo, InputInfo, ButtonInfo, ImageInfo
+from agent.extractor.policy.base import PolicyPipeline, apply_policy
+from agent.extractor.readiness import ReadinessCheck
+from agent.extractor.scripts import COLLECT_CHANGES_JS, COLLECT_ELEMENTS_JS, UNIQUE_SELECTOR_JS
+from agent.extractor.structures import (
+    ELEMENT_TARGETS, PageSnapshot, LinkInfo, InputInfo, ButtonInfo, ImageInfo, SnapshotDiff,
+)
 
 if TYPE_CHECKING:
     from playwright.async_api import Page
-    from agent.extractor.policy.base import Policy
+    from agent.extractor.policy.base import Policy, PolicyTarget
+
+
+RawElements = dict[str, list[dict[str, Any]]]
+
+_ITEM_TYPES = {"links": LinkInfo, "inputs": InputInfo, "buttons": ButtonInfo, "images": ImageInfo}
 
 
 class Extractor:
-    def __init__(self, page: 'Page', policies: Optional[list['Policy']] = None):
+    def __init__(
+            self,
+            page: 'Page',
+            policies: Optional[list['Policy']] = None,
+            readiness: Optional[ReadinessCheck] = None,
+    ):
         self.page = page
         self.policies = policies or []
+        self.pipeline = PolicyPipeline(self.policies, item_types=_ITEM_TYPES)
+        self.readiness = readiness or ReadinessCheck()
+        # Собранные DOM объекты до политик Python (например, дедупликации) по element_id
+        # и снапшот, для которого они актуальны — основа инкрементального сбора
+        self._collected: dict[str, dict[str, Any]] = {}
+        self._collected_for: Optional[PageSnapshot] = None
+
+    async def extract(self, *, track: bool = False) -> PageSnapshot:
+        """
+        Снимает снапшот страницы.
+
+        Готовность страницы ожидается один раз, после чего заголовок, текст и DOM объекты
+        собираются параллельно. При track=True на странице включается отслеживание мутаций
+        для последующих вызовов extract_incremental.
+        """
+
+        await self.readiness.wait(self.page)
+
+        title, text, raw = await asyncio.gather(
+            self.page.title(),
+            self.page.inner_text("body"),
+            self._evaluate_elements(*ELEMENT_TARGETS, track=track),
+        )
+        collected = self._instantiate(raw)
 
-    async def extract(self) -> PageSnapshot:
-        return PageSnapshot(
+        snapshot = PageSnapshot(
             url=self.page.url,
-            title=await self.page.title(),
-            text=await self.page.inner_text("body"),
-            links=await self.collect_links(),
-            inputs=await self.collect_inputs(),
-            buttons=await self.collect_buttons(),
-            images=await self.collect_images(),
+            title=title,
+            text=text,
+            **{target: self.pipeline.apply(target, collected[target]) for target in ELEMENT_TARGETS},
         )
-
-    @staticmethod
-    async def build_selector_for_element(el):
-        return await el.evaluate("""
-        node => {
-            if (node.id)
-                return `#${node.id}`;
-
-            const aria = node.getAttribute('aria-label');
-            if (aria)
-                return `[aria-label="${aria}"]`;
-
-            if (node.name)
-                return `${node.tagName.toLowerCase()}[name="${node.name}"]`;
-
-            if (node.placeholder)
-                return `${node.tagName.toLowerCase()}[placeholder="${node.placeholder}"]`;
-
-            if (node.className) {
-                const cls = node.className.split(' ')
-                    .filter(c => !c.startsWith('css-'))
-                    .slice(0, 2)
-                    .join('.');
-                if (cls)
-                    return `${node.tagName.toLowerCase()}.${cls}`;
+        if track:
+            self._collected = {
+                target: {item.element_id: item for item in items} for target, items in collected.items()
             }
+        self._collected_for = snapshot if track else None
+        return snapshot
+
+    async def extract_incremental(self, previous: Optional[PageSnapshot]) -> PageSnapshot:
+        """
+        Снимает снапшот страницы, повторно собирая только изменившиеся DOM объекты.
+
+        Неизменившиеся объекты переиспользуются из прошлого сбора (до политик Python, чтобы
+        отброшенные дедупликацией копии не собирались заново), разница с предыдущим снапшотом
+        доступна в PageSnapshot.diff. Если предыдущего снапшота нет, он получен не этим
+        Extractor, произошла навигация или отслеживание мутаций недоступно — выполняется полный сбор.
+        """
+
+        if previous is None or previous.url != self.page.url or previous is not self._collected_for:
+            return await self.extract(track=True)
+
+        await self.readiness.wait(self.page)
+
+        # Страница сама помнит, какие объекты уже переданы (в том числе отброшенные политиками),
+        # и заново описывает только изменившиеся и впервые прошедшие фильтры по узлу
+        changes = await self.page.evaluate(
+            COLLECT_CHANGES_JS,
+            {
+                "targets": list(ELEMENT_TARGETS),
+                "filters": self.pipeline.page_filters(ELEMENT_TARGETS),
+            },
+        )
+        if changes is None:
+            return await self.extract(track=True)
+        if changes["changed"] is None:
+            snapshot = replace(previous, diff=SnapshotDiff())
+            self._collected_for = snapshot
+            return snapshot
+
+        title, text = await asyncio.gather(
+            self.page.title(),
+            self.page.inner_text("body"),
+        )
+        fresh = self._instantiate(changes["changed"])
 
-            return node.tagName.toLowerCase();
-        }
-        """)
+        elements = {}
+        for target in ELEMENT_TARGETS:
+            collected = self._collected.setdefault(target, {})
+            for element_id in changes["dropped"][target]:
+                collected.pop(element_id, None)
+            collected.update((item.element_id, item) for item in fresh[target])
 
-    @apply_policy("links")
-    async def collect_links(self) -> list[LinkInfo]:
-        await self.page.wait_for_load_state("networkidle")
+            merged = [collected[element_id] for element_id in changes["order"][target] if element_id in collected]
+            # Политики с состоянием прохода (например, дедупликация) применяются ко всему списку
+            elements[target] = self.pipeline.apply(target, merged)
 
-        locator = self.page.locator("a")
-        count = await locator.count()
+        snapshot = PageSnapshot(
+            url=self.page.url,
+            title=title,
+            text=text,
+            **elements,
+        )
+        snapshot = replace(snapshot, diff=snapshot.diff_from(previous))
+        self._collected_for = snapshot
+        return snapshot
 
-        links = []
+    @staticmethod
+    def _instantiate(raw: RawElements) -> dict[str, list[Any]]:
+        """Преобразует сырые данные в DOM объекты без применения политик"""
 
-        for i in range(count):
-            el = locator.nth(i)
+        return {target: [_ITEM_TYPES[target](**item) for item in raw.get(target, [])] for target in ELEMENT_TARGETS}
 
-            text = (await el.inner_text()).strip()
-            href = await el.get_attribute("href") or ""
-            selector = await self.build_selector_for_element(el)
+    async def _evaluate_elements(self, *targets: 'PolicyTarget', track: bool = False) -> RawElements:
+        """
+        Собирает атрибуты и селекторы DOM объектов за одно выполнение скрипта на странице.
+        Фильтры политик с page_filter применяются там же, до передачи данных из браузера.
 
-            links.append(
-                LinkInfo(
-                    text=text,
-                    href=href,
-                    selector=selector,
-                )
-            )
+        Возвращает словарь сырых данных по каждой из запрошенных категорий.
+        """
 
-        return links
+        return await self.page.evaluate(
+            COLLECT_ELEMENTS_JS,
+            {"targets": list(targets), "track": track, "filters": self.pipeline.page_filters(targets)},
+        )
 
-    @apply_policy("inputs")
-    async def collect_inputs(self) -> list[InputInfo]:
-        await self.page.wait_for_load_state("networkidle")
+    async def _collect_raw(self, target: 'PolicyTarget') -> RawElements:
+        """Ожидает готовности страницы и собирает сырые данные одной категории"""
 
-        locator = self.page.locator("input")
-        count = await locator.count()
+        await self.readiness.wait(self.page)
+        return await self._evaluate_elements(target)
 
-        inputs = []
+    @staticmethod
+    async def build_selector_for_element(el):
+        return await el.evaluate(UNIQUE_SELECTOR_JS)
 
-        for i in range(count):
-            el = locator.nth(i)
+    @apply_policy("links")
+    async def collect_links(self, raw: Optional[RawElements] = None) -> list[LinkInfo]:
+        if raw is None:
+            raw = await self._collect_raw("links")
 
-            name = await el.get_attribute("name") or ""
-            input_type = await el.get_attribute("type") or "text"
-            placeholder = await el.get_attribute("placeholder") or ""
-            selector = await self.build_selector_for_element(el)
+        return [LinkInfo(**item) for item in raw["links"]]
 
-            inputs.append(
-                InputInfo(
-                    name=name,
-                    input_type=input_type,
-                    placeholder=placeholder,
-                    selector=selector,
-                )
-            )
+    @apply_policy("inputs")
+    async def collect_inputs(self, raw: Optional[RawElements] = None) -> list[InputInfo]:
+        if raw is None:
+            raw = await self._collect_raw("inputs")
 
-        return inputs
+        return [InputInfo(**item) for item in raw["inputs"]]
 
     @apply_policy("buttons")
-    async def collect_buttons(self) -> list[ButtonInfo]:
-        await self.page.wait_for_load_state("networkidle")
+    async def collect_buttons(self, raw: Optional[RawElements] = None) -> list[ButtonInfo]:
+        if raw is None:
+            raw = await self._collect_raw("buttons")
 
-        locator = self.page.locator("button")
-        count = await locator.count()
-
-        buttons = []
-
-        for i in range(count):
-            el = locator.nth(i)
-
-            text = (await el.inner_text()).strip()
-            selector = await self.build_selector_for_element(el)
-            aria_label = await el.get_attribute("aria-label") or ""
-            button_type = await el.get_attribute("type") or ""
-            disabled = await el.get_attribute("disabled") or False
-
-            buttons.append(
-                ButtonInfo(
-                    text=text,
-                    selector=selector,
-                    aria_label=aria_label,
-                    button_type=button_type,
-                    disabled=disabled,
-                )
-            )
-
-        return buttons
+        return [ButtonInfo(**item) for item in raw["buttons"]]
 
     @apply_policy("images")
-    async def collect_images(self) -> list[ImageInfo]:
-        await self.page.wait_for_load_state("networkidle")
-
-        locator = self.page.locator("img")
-        count = await locator.count()
-
-        images = []
-
-        for i in range(count):
-            el = locator.nth(i)
-
-            src = await el.get_attribute("src") or ""
-            alt = await el.get_attribute("alt") or ""
-            selector = await self.build_selector_for_element(el)
-            title = await el.get_attribute("title") or ""
-            aria_label = await el.get_attribute("aria-label") or ""
-            width = await el.get_attribute("width") or 0
-            height = await el.get_attribute("height") or 0
-
-            images.append(
-                ImageInfo(
-                    src=src,
-                    alt=alt,
-                    selector=selector,
-                    title=title,
-                    aria_label=aria_label,
-                    width=width,
-                    height=height,
-                )
-            )
-
-        return images
+    async def collect_images(self, raw: Optional[RawElements] = None) -> list[ImageInfo]:
+        if raw is None:
+            raw = await self._collect_raw("images")
+
+        return [ImageInfo(**item) for item in raw["images"]]
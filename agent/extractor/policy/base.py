@@ -1,9 +1,11 @@
+from dataclasses import fields as dataclass_fields
 from functools import wraps
-from typing import Iterable, Literal, Callable, Awaitable, Any
+from typing import Iterable, Literal, Callable, Awaitable, Any, Optional
 
 
 PolicyTarget = Literal["links", "inputs", "buttons", "images"]
 PolicyItems = Iterable["LinkInfo"] | Iterable["InputInfo"] | Iterable["ButtonInfo"] | Iterable["ImageInfo"]
+Predicate = Callable[[Any], bool]
 
 
 def apply_policy(
@@ -16,10 +18,7 @@ def apply_policy(
         @wraps(func)
         async def wrapper(self, *args, **kwargs):
             items = await func(self, *args, **kwargs)
-            for policy in self.policies:
-                items = list(policy.apply(target, items))
-
-            return items
+            return self.pipeline.apply(target, items)
 
         return wrapper
 
@@ -27,10 +26,101 @@ def apply_policy(
 
 
 class Policy:
-    """Базовый класс политики Extractor сборщиков"""
+    """
+    Базовый класс политики Extractor сборщиков.
+
+    Политика-фильтр описывается декларативно:
+    - targets — категории, к которым она применяется (None — все);
+    - fields — поля DOM объекта, которые она читает;
+    - page_filter — описание фильтра для выполнения на странице (см. compileFilters
+      в COLLECT_ELEMENTS_JS, agent/extractor/scripts.py),
+      тогда отброшенные объекты не передаются из браузера;
+    - filter() — предикат для проверки на стороне Python.
+
+    Политики, переопределяющие apply(), выполняются как произвольное преобразование списка.
+    """
+    targets: Optional[frozenset[PolicyTarget]] = None
+    fields: tuple[str, ...] = ()
+    page_filter: Optional[dict[str, Any]] = None
+
+    def applies_to(self, target: PolicyTarget) -> bool:
+        return self.targets is None or target in self.targets
+
+    def filter(self, target: PolicyTarget) -> Optional[Predicate]:
+        """Предикат одного прохода по объектам категории (может хранить состояние прохода)"""
+
+        return None
+
     def apply(
             self,
             target: PolicyTarget,
             items: PolicyItems,
     ) -> PolicyItems:
-        return items
+        predicate = self.filter(target) if self.applies_to(target) else None
+        if predicate is None:
+            return items
+        return [item for item in items if predicate(item)]
+
+
+class PolicyPipeline:
+    """
+    Конвейер политик Extractor.
+
+    Фильтры с page_filter выполняются на странице при сборе DOM объектов; остальные
+    предикаты объединяются в один проход по списку. Политики с собственным apply()
+    выполняются по порядку между проходами.
+    """
+    def __init__(self, policies: Iterable[Policy], item_types: Optional[dict[str, type]] = None):
+        self.policies = list(policies)
+        if item_types:
+            self._check_fields(item_types)
+
+    def _check_fields(self, item_types: dict[str, type]) -> None:
+        for policy in self.policies:
+            for target, item_type in item_types.items():
+                if not policy.applies_to(target):
+                    continue
+                known = {f.name for f in dataclass_fields(item_type)}
+                unknown = set(policy.fields) - known
+                if unknown:
+                    raise ValueError(
+                        f"{type(policy).__name__} needs unknown {target} fields: {', '.join(sorted(unknown))}"
+                    )
+
+    def page_filters(self, targets: Iterable[PolicyTarget]) -> dict[str, list[dict[str, Any]]]:
+        """Описания фильтров, выполняемых на странице, по категориям"""
+
+        return {
+            target: [
+                policy.page_filter for policy in self.policies
+                if policy.page_filter is not None and policy.applies_to(target)
+            ]
+            for target in targets
+        }
+
+    def apply(self, target: PolicyTarget, items: Iterable[Any]) -> list[Any]:
+        predicates: list[Predicate] = []
+        result = items
+        for policy in self.policies:
+            if not policy.applies_to(target):
+                continue
+
+            if type(policy).apply is not Policy.apply:
+                result = self._filter(result, predicates)
+                predicates = []
+                result = list(policy.apply(target, result))
+            elif policy.page_filter is None:
+                predicate = policy.filter(target)
+                if predicate is not None:
+                    predicates.append(predicate)
+
+        return self._filter(result, predicates)
+
+    @staticmethod
+    def _filter(items: Iterable[Any], predicates: list[Predicate]) -> list[Any]:
+        if not predicates:
+            return list(items)
+        if len(predicates) == 1:
+            predicate = predicates[0]
+            return [item for item in items if predicate(item)]
+        return [item for item in items if all(predicate(item) for predicate in predicates)]
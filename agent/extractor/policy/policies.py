@@ -1,18 +1,101 @@
-from agent.extractor.policy.base import Policy, PolicyTarget, PolicyItems
+from typing import Optional
+
+from agent.extractor.policy.base import Policy, PolicyTarget, Predicate
 
 
 class ExcludeHiddenPolicy(Policy):
-    def apply(self, target: PolicyTarget, items: PolicyItems) -> PolicyItems:
-        if target != "inputs":
-            return items
-        return [item for item in items if item.input_type != "hidden"]
+    targets = frozenset({"inputs"})
+    fields = ("input_type",)
+    page_filter = {"kind": "field", "field": "input_type", "op": "ne", "value": "hidden"}
+
+    def filter(self, target: PolicyTarget) -> Optional[Predicate]:
+        return lambda item: item.input_type != "hidden"
 
 
 class HrefNecessaryPolicy(Policy):
-    def apply(self, target: PolicyTarget, items: PolicyItems) -> PolicyItems:
-        if target != "links":
-            return items
-        return [item for item in items if item.href]
+    targets = frozenset({"links"})
+    fields = ("href",)
+    page_filter = {"kind": "field", "field": "href", "op": "truthy"}
+
+    def filter(self, target: PolicyTarget) -> Optional[Predicate]:
+        return lambda item: bool(item.href)
+
+
+class ExcludeZeroSizePolicy(Policy):
+    """
+    Исключает элементы нулевого размера (не отрисованные, display: none и т.п.).
+
+    Изображения не фильтруются: заблокированное (--block image) или ещё не загруженное
+    лениво изображение имеет нулевой размер, но его src/alt остаются полезны.
+    """
+    targets = frozenset({"links", "inputs", "buttons"})
+    page_filter = {"kind": "node", "name": "nonZeroSize"}
+
+
+class ExcludeOffViewportPolicy(Policy):
+    """
+    Исключает невидимые элементы и элементы за пределами области просмотра
+    (с запасом margin_px). После прокрутки инкрементальный снапшот собирается заново.
+    """
+    def __init__(self, margin_px: int = 0):
+        self.page_filter = {"kind": "node", "name": "inViewport", "params": {"margin": margin_px}, "volatile": True}
+
+
+class DedupeLinksPolicy(Policy):
+    """Оставляет только первую ссылку с каждым href"""
+    targets = frozenset({"links"})
+    fields = ("href",)
+
+    def filter(self, target: PolicyTarget) -> Optional[Predicate]:
+        seen = set()
+
+        def first_with_href(item) -> bool:
+            if not item.href:
+                return True
+            if item.href in seen:
+                return False
+            seen.add(item.href)
+            return True
+
+        return first_with_href
+
+
+class DedupeImagesPolicy(Policy):
+    """
+    Оставляет только первое из одинаковых изображений (повторяющиеся иконки, спейсеры):
+    они отличаются лишь element_id и ничего не добавляют к состоянию страницы
+    """
+    targets = frozenset({"images"})
+    fields = ("src", "alt", "title", "aria_label", "width", "height")
+
+    def filter(self, target: PolicyTarget) -> Optional[Predicate]:
+        seen = set()
+
+        def first_identical(item) -> bool:
+            key = tuple(getattr(item, field) for field in self.fields)
+            if key in seen:
+                return False
+            seen.add(key)
+            return True
+
+        return first_identical
+
+
+def default_policies(viewport_only: bool = False) -> list[Policy]:
+    """Набор политик Extractor по умолчанию"""
+
+    policies = [ExcludeHiddenPolicy(), ExcludeZeroSizePolicy(), DedupeLinksPolicy(), DedupeImagesPolicy()]
+    if viewport_only:
+        policies.append(ExcludeOffViewportPolicy())
+    return policies
 
 
-__all__ = ["ExcludeHiddenPolicy", "HrefNecessaryPolicy"]
+__all__ = [
+    "ExcludeHiddenPolicy",
+    "HrefNecessaryPolicy",
+    "ExcludeZeroSizePolicy",
+    "ExcludeOffViewportPolicy",
+    "DedupeLinksPolicy",
+    "DedupeImagesPolicy",
+    "default_policies",
+]
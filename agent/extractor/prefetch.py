@@ -0,0 +1,86 @@
+import asyncio
+from typing import TYPE_CHECKING, Awaitable, Callable, Optional
+
+if TYPE_CHECKING:
+    from agent.extractor.structures import PageSnapshot
+
+
+class SnapshotPrefetcher:
+    """
+    Упреждающий сбор снапшотов страницы.
+
+    Позволяет совместить извлечение снапшота с работой модели и выводом в UI:
+    - schedule: запускает сбор снапшота в фоне (например, сразу после действия);
+    - get: возвращает запущенный ранее снапшот, дожидаясь его при необходимости;
+    - start_warming/stop_warming: периодически обновляют снапшот текущей страницы,
+      пока модель формирует предложение.
+
+    Фоновый сбор никогда не прерывается посередине: при инкрементальном извлечении
+    это привело бы к потере накопленных изменений DOM.
+    """
+    def __init__(
+            self,
+            take_snapshot: Callable[[], Awaitable['PageSnapshot']],
+            interval: float = 1.0,
+    ):
+        self._take_snapshot = take_snapshot
+        self.interval = interval
+        self.latest: Optional['PageSnapshot'] = None
+
+        self._pending: Optional[asyncio.Task] = None
+        self._warming: Optional[asyncio.Task] = None
+        self._stop_warming = asyncio.Event()
+
+    def schedule(self) -> None:
+        """Запускает сбор снапшота в фоне, если он ещё не запущен"""
+
+        if self._pending is None:
+            self._pending = asyncio.create_task(self._take_snapshot())
+
+    async def get(self) -> 'PageSnapshot':
+        """Возвращает снапшот, запущенный через schedule, либо собирает новый"""
+
+        self.schedule()
+        task, self._pending = self._pending, None
+        self.latest = await task
+        return self.latest
+
+    def start_warming(self) -> None:
+        """Запускает периодическое обновление снапшота текущей страницы"""
+
+        if self._warming is None:
+            self._stop_warming.clear()
+            self._warming = asyncio.create_task(self._warm())
+
+    async def stop_warming(self) -> None:
+        """Останавливает обновление, дожидаясь завершения текущего сбора"""
+
+        task, self._warming = self._warming, None
+        if task is None:
+            return
+
+        self._stop_warming.set()
+        await task
+
+    async def close(self) -> None:
+        """Завершает все фоновые сборы"""
+
+        await self.stop_warming()
+
+        task, self._pending = self._pending, None
+        if task is not None:
+            await asyncio.gather(task, return_exceptions=True)
+
+    async def _warm(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._stop_warming.wait(), self.interval)
+                return
+            except TimeoutError:
+                pass
+
+            try:
+                self.latest = await self._take_snapshot()
+            except Exception:
+                # Страница могла начать навигацию; актуальный снапшот будет собран после действия
+                return
@@ -0,0 +1,54 @@
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+from agent.extractor.scripts import MUTATION_QUIET_JS
+from cli.config import Readiness
+
+if TYPE_CHECKING:
+    from playwright.async_api import Page
+    from cli.config import RunConfig
+
+
+@dataclass(frozen=True)
+class ReadinessCheck:
+    """
+    Стратегия ожидания готовности страницы перед снятием снапшота.
+
+    - networkidle: ожидание отсутствия сетевой активности (по умолчанию);
+    - domcontentloaded: только разбор DOM, без ожидания подресурсов;
+    - mutation_quiet: DOM не меняется в течение quiet_ms;
+    - deadline: networkidle, но не дольше timeout_ms и без ошибки по таймауту.
+    """
+    strategy: Readiness = Readiness.networkidle
+    timeout_ms: int = 30_000
+    quiet_ms: int = 500
+
+    @staticmethod
+    def from_config(config: 'RunConfig') -> 'ReadinessCheck':
+        return ReadinessCheck(
+            strategy=config.readiness,
+            timeout_ms=config.readiness_timeout_ms,
+            quiet_ms=config.quiet_window_ms,
+        )
+
+    async def wait(self, page: 'Page') -> None:
+        """Ожидает готовности страницы согласно выбранной стратегии"""
+
+        match self.strategy:
+            case Readiness.networkidle:
+                await page.wait_for_load_state("networkidle", timeout=self.timeout_ms)
+            case Readiness.domcontentloaded:
+                await page.wait_for_load_state("domcontentloaded", timeout=self.timeout_ms)
+            case Readiness.mutation_quiet:
+                await page.wait_for_load_state("domcontentloaded", timeout=self.timeout_ms)
+                await page.evaluate(
+                    MUTATION_QUIET_JS,
+                    {"quietMs": self.quiet_ms, "timeoutMs": self.timeout_ms},
+                )
+            case Readiness.deadline:
+                try:
+                    await page.wait_for_load_state("networkidle", timeout=self.timeout_ms)
+                except PlaywrightTimeoutError:
+                    pass
@@ -0,0 +1,453 @@
+"""
+JS-скрипты, выполняемые Extractor внутри страницы.
+
+Вынесены в отдельный модуль, чтобы сборщики DOM объектов получали все данные
+за одно выполнение скрипта, а не за отдельный вызов Playwright на каждый атрибут.
+"""
+
+
+# Эвристический селектор узла. Всегда начинается с имени тега, поэтому его уникальность
+# можно проверить подсчётом среди узлов того же тега. Уникальность не гарантируется.
+BUILD_SELECTOR_JS = """
+node => {
+    const tag = node.tagName.toLowerCase();
+    const quote = value => `"${value.replace(/["\\\\]/g, '\\\\$&')}"`;
+
+    if (node.id)
+        return `${tag}#${CSS.escape(node.id)}`;
+
+    const aria = node.getAttribute('aria-label');
+    if (aria)
+        return `${tag}[aria-label=${quote(aria)}]`;
+
+    const name = node.getAttribute('name');
+    if (name)
+        return `${tag}[name=${quote(name)}]`;
+
+    const placeholder = node.getAttribute('placeholder');
+    if (placeholder)
+        return `${tag}[placeholder=${quote(placeholder)}]`;
+
+    if (typeof node.className === 'string' && node.className) {
+        const cls = node.className.split(' ')
+            .filter(c => c && !c.startsWith('css-'))
+            .slice(0, 2)
+            .map(c => CSS.escape(c))
+            .join('.');
+        if (cls)
+            return `${tag}.${cls}`;
+    }
+
+    return tag;
+}
+"""
+
+
+# CSS путь узла через :nth-of-type от ближайшего предка с уникальным id (или от корня)
+CSS_PATH_JS = """
+node => {
+    const parts = [];
+    for (let el = node; el && el.nodeType === Node.ELEMENT_NODE; el = el.parentElement) {
+        const tag = el.tagName.toLowerCase();
+        if (el.id && el !== node) {
+            const anchor = `${tag}#${CSS.escape(el.id)}`;
+            if (document.querySelectorAll(anchor).length === 1) {
+                parts.unshift(anchor);
+                break;
+            }
+        }
+        if (!el.parentElement) {
+            parts.unshift(tag);
+            break;
+        }
+        let index = 1;
+        for (let sibling = el.previousElementSibling; sibling; sibling = sibling.previousElementSibling)
+            if (sibling.tagName === el.tagName)
+                index++;
+        parts.unshift(`${tag}:nth-of-type(${index})`);
+    }
+    return parts.join(' > ');
+}
+"""
+
+
+# Проверенно уникальный селектор узла: эвристический, если он уникален, иначе CSS путь
+UNIQUE_SELECTOR_JS = f"""
+node => {{
+    const buildSelector = {BUILD_SELECTOR_JS.strip()};
+    const cssPath = {CSS_PATH_JS.strip()};
+    const candidate = buildSelector(node);
+    return document.querySelectorAll(candidate).length === 1 ? candidate : cssPath(node);
+}}
+"""
+
+
+ELEMENT_ID_ATTRIBUTE = "data-agent-id"
+
+# CSS путь, сохранённый для element_id при сборе (запасной вариант, если узел был перерисован)
+RESOLVE_CSS_PATH_JS = "id => window.__agentRegistry ? window.__agentRegistry.paths.get(id) || null : null"
+
+
+# Общие объявления для скриптов сбора: описание DOM объектов по категориям,
+# присвоение element_id и отслеживание мутаций для инкрементальных снапшотов.
+_ELEMENT_HELPERS_JS = f"""
+    const buildSelector = {BUILD_SELECTOR_JS.strip()};
+    const cssPath = {CSS_PATH_JS.strip()};
+    const attr = (node, name) => node.getAttribute(name) || '';
+    const text = node => (node.innerText || '').trim();
+    const size = (node, name) => parseInt(node.getAttribute(name), 10) || 0;
+
+    const ID_ATTRIBUTE = '{ELEMENT_ID_ATTRIBUTE}';
+    const tags = {{links: 'a', inputs: 'input', buttons: 'button', images: 'img'}};
+
+    // Реестр element_id страницы: узел по id, id по отпечатку содержимого и CSS пути.
+    // Перерисованный узел с тем же содержимым получает id своего отключённого предшественника.
+    const registry = window.__agentRegistry ||= {{nodes: new Map(), byFingerprint: new Map(), paths: new Map()}};
+    const candidates = new Map();
+    const candidateOf = node => {{
+        let candidate = candidates.get(node);
+        if (candidate === undefined) {{
+            candidate = buildSelector(node);
+            candidates.set(node, candidate);
+        }}
+        return candidate;
+    }};
+    const fingerprint = node => [candidateOf(node), attr(node, 'href'), attr(node, 'src'), text(node).slice(0, 80)].join('|');
+    const stamp = node => {{
+        let id = node.getAttribute(ID_ATTRIBUTE);
+        if (id) {{
+            // Копия узла (cloneNode в каруселях, виртуальных списках) приходит с чужим id —
+            // такой узел получает собственный
+            const owner = registry.nodes.get(id)?.deref();
+            if (owner === node)
+                return id;
+            if (!owner || !owner.isConnected) {{
+                registry.nodes.set(id, new WeakRef(node));
+                return id;
+            }}
+        }}
+
+        const key = fingerprint(node);
+        const known = registry.byFingerprint.get(key) || [];
+        id = known.find(known_id => {{
+            const previous = registry.nodes.get(known_id)?.deref();
+            return !previous || !previous.isConnected;
+        }});
+        if (!id) {{
+            window.__agentIdSeq = (window.__agentIdSeq || 0) + 1;
+            id = String(window.__agentIdSeq);
+            registry.byFingerprint.set(key, [...known, id]);
+        }}
+        registry.nodes.set(id, new WeakRef(node));
+        node.setAttribute(ID_ATTRIBUTE, id);
+        return id;
+    }};
+
+    // Число узлов страницы, которые находит эвристический селектор (один запрос на селектор).
+    // matchedBy — селекторы, которым соответствовал узел при подсчёте; byTag — подсчитанные
+    // селекторы по тегу. При отслеживании мутаций подсчёт сохраняется между сборами.
+    let matches = {{counts: new Map(), matchedBy: new WeakMap(), byTag: new Map()}};
+    const recount = candidate => {{
+        const found = document.querySelectorAll(candidate);
+        matches.counts.set(candidate, found.length);
+        const tag = candidate.split(/[#.[]/)[0];
+        if (!matches.byTag.has(tag))
+            matches.byTag.set(tag, new Set());
+        matches.byTag.get(tag).add(candidate);
+        for (const node of found) {{
+            if (!matches.matchedBy.has(node))
+                matches.matchedBy.set(node, new Set());
+            matches.matchedBy.get(node).add(candidate);
+        }}
+        return found;
+    }};
+    const matchCount = candidate => {{
+        const count = matches.counts.get(candidate);
+        return count === undefined ? recount(candidate).length : count;
+    }};
+    const uniqueSelector = (node, id) => {{
+        const candidate = candidateOf(node);
+        if (matchCount(candidate) === 1)
+            return candidate;
+        registry.paths.set(id, cssPath(node));
+        return `[${{ID_ATTRIBUTE}}="${{id}}"]`;
+    }};
+
+    const collectors = {{
+        links: node => ({{
+            text: text(node),
+            href: attr(node, 'href'),
+        }}),
+        inputs: node => ({{
+            name: attr(node, 'name'),
+            input_type: attr(node, 'type') || 'text',
+            placeholder: attr(node, 'placeholder'),
+        }}),
+        buttons: node => ({{
+            text: text(node),
+            aria_label: attr(node, 'aria-label'),
+            button_type: attr(node, 'type'),
+            disabled: node.hasAttribute('disabled'),
+        }}),
+        images: node => ({{
+            src: attr(node, 'src'),
+            alt: attr(node, 'alt'),
+            title: attr(node, 'title'),
+            aria_label: attr(node, 'aria-label'),
+            width: size(node, 'width'),
+            height: size(node, 'height'),
+        }}),
+    }};
+    const describe = (target, node) => {{
+        const id = stamp(node);
+        return {{...collectors[target](node), selector: uniqueSelector(node, id), element_id: id}};
+    }};
+
+    // Фильтры политик Extractor, выполняемые на странице (см. Policy.page_filter):
+    // node — по самому DOM узлу до описания, field — по полю описанного объекта.
+    const viewportKey = () => `${{scrollX}},${{scrollY}},${{innerWidth}},${{innerHeight}}`;
+    const nodeFilters = {{
+        nonZeroSize: node => {{
+            const rect = node.getBoundingClientRect();
+            return rect.width > 0 && rect.height > 0;
+        }},
+        inViewport: (node, {{margin = 0}} = {{}}) => {{
+            if (node.checkVisibility && !node.checkVisibility({{opacityProperty: true, visibilityProperty: true}}))
+                return false;
+            const rect = node.getBoundingClientRect();
+            if (!rect.width && !rect.height)
+                return false;
+            return rect.bottom >= -margin && rect.right >= -margin
+                && rect.top <= innerHeight + margin && rect.left <= innerWidth + margin;
+        }},
+    }};
+    const fieldOps = {{
+        truthy: value => Boolean(value),
+        eq: (value, expected) => value === expected,
+        ne: (value, expected) => value !== expected,
+        in: (value, expected) => expected.includes(value),
+        not_in: (value, expected) => !expected.includes(value),
+    }};
+    const compileFilters = (filters = {{}}) => {{
+        const compiled = {{}};
+        for (const [target, specs] of Object.entries(filters)) {{
+            const node = [];
+            const record = [];
+            for (const spec of specs) {{
+                if (spec.kind === 'node')
+                    node.push(item => nodeFilters[spec.name](item, spec.params));
+                else
+                    record.push(item => fieldOps[spec.op](item[spec.field], spec.value));
+            }}
+            compiled[target] = {{node, record}};
+        }}
+        return compiled;
+    }};
+    const isVolatile = (filters = {{}}) => Object.values(filters).some(specs => specs.some(spec => spec.volatile));
+    const passesNode = (compiled, target, node) => (compiled[target]?.node || []).every(check => check(node));
+    const passesRecord = (compiled, target, item) => (compiled[target]?.record || []).every(check => check(item));
+
+    const installTracker = () => {{
+        const existing = window.__agentTracker;
+        if (existing) {{
+            existing.deep.clear();
+            existing.shallow.clear();
+            existing.removed.clear();
+            existing.reported.clear();
+            existing.viewport = viewportKey();
+            existing.matches = matches;
+            return;
+        }}
+
+        // deep: корни добавленных поддеревьев; shallow: узлы, у которых изменились
+        // атрибуты, текст или состав потомков; removed: корни удалённых поддеревьев;
+        // matches: подсчёт совпадений эвристических селекторов (заполняется при описании);
+        // reported: element_id узлов, описание которых уже передано вызывающей стороне
+        // (в том числе отброшенных фильтрами по полям) и с тех пор не изменилось.
+        const tracker = {{
+            deep: new Set(), shallow: new Set(), removed: new Set(), reported: new Set(),
+            viewport: viewportKey(), matches,
+        }};
+        tracker.observer = new MutationObserver(records => {{
+            for (const record of records) {{
+                if (record.type === 'attributes' && record.attributeName === ID_ATTRIBUTE)
+                    continue;
+
+                const node = record.target.nodeType === Node.ELEMENT_NODE
+                    ? record.target
+                    : record.target.parentElement;
+                if (node)
+                    tracker.shallow.add(node);
+
+                for (const added of record.addedNodes || [])
+                    if (added.nodeType === Node.ELEMENT_NODE)
+                        tracker.deep.add(added);
+                for (const removed of record.removedNodes || [])
+                    if (removed.nodeType === Node.ELEMENT_NODE)
+                        tracker.removed.add(removed);
+            }}
+        }});
+        tracker.observer.observe(document, {{
+            subtree: true, childList: true, attributes: true, characterData: true,
+        }});
+        window.__agentTracker = tracker;
+    }};
+"""
+
+
+COLLECT_ELEMENTS_JS = f"""
+({{targets, track, filters}}) => {{
+    {_ELEMENT_HELPERS_JS.strip()}
+
+    if (track)
+        installTracker();
+
+    const compiled = compileFilters(filters);
+    const result = {{}};
+    for (const target of targets) {{
+        result[target] = [];
+        for (const node of document.querySelectorAll(tags[target])) {{
+            if (!passesNode(compiled, target, node))
+                continue;
+            const item = describe(target, node);
+            if (track)
+                window.__agentTracker.reported.add(item.element_id);
+            if (passesRecord(compiled, target, item))
+                result[target].push(item);
+        }}
+    }}
+    return result;
+}}
+"""
+
+
+# Возвращает null, если отслеживание мутаций не установлено (например, после навигации)
+# или фильтры зависят от области просмотра, а она изменилась. Иначе — данные только
+# изменившихся DOM объектов, element_id изменившихся, но отброшенных фильтрами объектов (dropped)
+# и актуальный порядок element_id. Объекты из порядка, описание которых ещё не передавалось
+# (tracker.reported), описываются заново: например, показанное вместе с предком меню.
+COLLECT_CHANGES_JS = f"""
+({{targets, filters}}) => {{
+    {_ELEMENT_HELPERS_JS.strip()}
+
+    const tracker = window.__agentTracker;
+    if (!tracker)
+        return null;
+    if (isVolatile(filters) && tracker.viewport !== viewportKey())
+        return null;
+    if (!tracker.deep.size && !tracker.shallow.size && !tracker.removed.size)
+        return {{changed: null, dropped: null, order: null}};
+
+    const selector = targets.map(target => tags[target]).join(',');
+    const nodes = new Set();
+
+    for (const root of tracker.deep) {{
+        if (!root.isConnected)
+            continue;
+        if (root.matches(selector))
+            nodes.add(root);
+        root.querySelectorAll(selector).forEach(node => nodes.add(node));
+    }}
+    for (const node of tracker.shallow) {{
+        if (!node.isConnected)
+            continue;
+        const owner = node.closest(selector);
+        if (owner)
+            nodes.add(owner);
+    }}
+    const removed = [];
+    for (const root of tracker.removed) {{
+        if (root.isConnected)
+            continue;
+        if (root.matches(selector))
+            removed.push(root);
+        removed.push(...root.querySelectorAll(selector));
+    }}
+    tracker.deep.clear();
+    tracker.shallow.clear();
+    tracker.removed.clear();
+
+    // Совпадения эвристического селектора меняются только у добавленных, удалённых узлов
+    // и узлов с изменёнными атрибутами: пересчитываются селекторы, которым такие узлы
+    // соответствовали или соответствуют теперь. Узлы, чей селектор стал (или перестал быть)
+    // уникальным, меняют selector и описываются заново.
+    matches = tracker.matches;
+    const affected = new Set();
+    for (const node of [...nodes, ...removed])
+        for (const candidate of matches.matchedBy.get(node) || [])
+            affected.add(candidate);
+    for (const node of nodes) {{
+        affected.add(candidateOf(node));
+        for (const candidate of matches.byTag.get(node.tagName.toLowerCase()) || [])
+            if (node.matches(candidate))
+                affected.add(candidate);
+    }}
+    for (const candidate of affected) {{
+        const previous = matches.counts.get(candidate);
+        const found = recount(candidate);
+        if (previous !== undefined && (previous === 1) !== (found.length === 1))
+            for (const node of found)
+                if (candidateOf(node) === candidate)
+                    nodes.add(node);
+    }}
+
+    const compiled = compileFilters(filters);
+    const changed = {{}};
+    const dropped = {{}};
+    const order = {{}};
+    for (const target of targets) {{
+        changed[target] = [];
+        dropped[target] = [];
+        order[target] = [];
+        for (const node of document.querySelectorAll(tags[target]))
+            if (passesNode(compiled, target, node)) {{
+                const id = stamp(node);
+                order[target].push(id);
+                if (!tracker.reported.has(id))
+                    nodes.add(node);
+            }}
+    }}
+    for (const node of nodes)
+        for (const target of targets) {{
+            if (!node.matches(tags[target]))
+                continue;
+            // Скрытый узел описывается, когда снова пройдёт фильтры по узлу
+            if (!passesNode(compiled, target, node)) {{
+                const id = stamp(node);
+                tracker.reported.delete(id);
+                dropped[target].push(id);
+                continue;
+            }}
+            const item = describe(target, node);
+            tracker.reported.add(item.element_id);
+            if (passesRecord(compiled, target, item))
+                changed[target].push(item);
+            else
+                dropped[target].push(item.element_id);
+        }}
+
+    return {{changed, dropped, order}};
+}}
+"""
+
+
+MUTATION_QUIET_JS = """
+({quietMs, timeoutMs}) => new Promise(resolve => {
+    let quietTimer = null;
+    const finish = () => {
+        observer.disconnect();
+        clearTimeout(quietTimer);
+        clearTimeout(deadlineTimer);
+        resolve();
+    };
+    const restart = () => {
+        clearTimeout(quietTimer);
+        quietTimer = setTimeout(finish, quietMs);
+    };
+    const observer = new MutationObserver(restart);
+    const deadlineTimer = setTimeout(finish, timeoutMs);
+
+    observer.observe(document, {subtree: true, childList: true, attributes: true, characterData: true});
+    restart();
+})
+"""
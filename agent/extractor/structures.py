@@ -1,5 +1,5 @@
-from dataclasses import dataclass, asdict
-from typing import Any, Dict, List, Optional
+from dataclasses import dataclass, asdict, field
+from typing import Any, Dict, List, Optional, Union
 
 
 @dataclass(frozen=True)
@@ -7,6 +7,7 @@ class LinkInfo:
     text: str
     href: str
     selector: str = ""
+    element_id: str = ""
 
 
 @dataclass(frozen=True)
@@ -15,6 +16,7 @@ class InputInfo:
     input_type: str
     placeholder: str
     selector: str = ""
+    element_id: str = ""
 
 
 @dataclass(frozen=True)
@@ -24,6 +26,7 @@ class ButtonInfo:
     aria_label: str = ""
     button_type: str = ""
     disabled: bool = False
+    element_id: str = ""
 
 
 @dataclass(frozen=True)
@@ -35,6 +38,41 @@ class ImageInfo:
     aria_label: str = ""
     width: int = 0
     height: int = 0
+    element_id: str = ""
+
+
+ElementInfo = Union[LinkInfo, InputInfo, ButtonInfo, ImageInfo]
+
+ELEMENT_TARGETS = ("links", "inputs", "buttons", "images")
+
+
+def element_key(item: ElementInfo) -> Any:
+    """Ключ сопоставления DOM объекта между снапшотами: element_id, либо сам объект"""
+
+    return item.element_id or item
+
+
+@dataclass(frozen=True)
+class SnapshotDiff:
+    """
+    Разница между двумя снапшотами одной страницы.
+
+    Элементы сгруппированы по категориям (links, inputs, buttons, images).
+    """
+    added: Dict[str, List[ElementInfo]] = field(default_factory=dict)
+    removed: Dict[str, List[ElementInfo]] = field(default_factory=dict)
+    changed: Dict[str, List[ElementInfo]] = field(default_factory=dict)
+    title_changed: bool = False
+    text_changed: bool = False
+
+    def is_empty(self) -> bool:
+        return not (
+            any(self.added.values())
+            or any(self.removed.values())
+            or any(self.changed.values())
+            or self.title_changed
+            or self.text_changed
+        )
 
 
 @dataclass(frozen=True)
@@ -47,6 +85,43 @@ class PageSnapshot:
     buttons: List[ButtonInfo]
     images: List[ImageInfo]
     screenshot_base64: Optional[str] = None
+    diff: Optional[SnapshotDiff] = field(default=None, compare=False)
+
+    def elements(self, target: str) -> List[ElementInfo]:
+        return getattr(self, target)
+
+    def state_hash(self) -> int:
+        """Хэш состояния страницы (без скриншота), для сравнения снапшотов в пределах процесса"""
+
+        return hash((
+            self.url,
+            self.title,
+            self.text,
+            *(tuple(self.elements(target)) for target in ELEMENT_TARGETS),
+        ))
+
+    def diff_from(self, previous: 'PageSnapshot') -> SnapshotDiff:
+        """Вычисляет разницу относительно предыдущего снапшота той же страницы"""
+
+        added, removed, changed = {}, {}, {}
+        for target in ELEMENT_TARGETS:
+            before = {element_key(item): item for item in previous.elements(target)}
+            after = {element_key(item): item for item in self.elements(target)}
+
+            added[target] = [item for key, item in after.items() if key not in before]
+            removed[target] = [item for key, item in before.items() if key not in after]
+            changed[target] = [
+                item for key, item in after.items()
+                if key in before and before[key] != item
+            ]
+
+        return SnapshotDiff(
+            added=added,
+            removed=removed,
+            changed=changed,
+            title_changed=self.title != previous.title,
+            text_changed=self.text != previous.text,
+        )
 
     def to_summary(self, max_len: int = 800) -> str:
         text = self.text
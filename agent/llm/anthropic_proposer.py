@@ -1,14 +1,25 @@
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Optional
 
 if TYPE_CHECKING:
+    from agent.llm.base import ProposalTiming
     from cli.config import RunConfig
     from agent.extractor.extractor import PageSnapshot
     from agent.navigator.actions.structures import ActionProposal
 
 
 class ClaudeProposer:
+    last_timing: Optional['ProposalTiming'] = None
+
     def __init__(self, config: 'RunConfig', timeout: int = 30):
         ...
 
-    def get_proposal(self, user_prompt: str, page_snapshot: 'PageSnapshot') -> 'ActionProposal':
+    def reset(self) -> None:
+        ...
+
+    async def get_proposals(
+            self,
+            user_prompt: str,
+            page_snapshot: 'PageSnapshot',
+            action_error: Optional[str] = None,
+    ) -> list['ActionProposal']:
         ...
@@ -1,4 +1,5 @@
-from typing import Protocol, TYPE_CHECKING
+from dataclasses import dataclass
+from typing import Optional, Protocol, TYPE_CHECKING
 
 if TYPE_CHECKING:
     from cli.config import RunConfig
@@ -6,6 +7,17 @@ if TYPE_CHECKING:
     from agent.navigator.actions.structures import ActionProposal
 
 
+@dataclass(frozen=True)
+class ProposalTiming:
+    """
+    Замеры времени получения предложения действия (в секундах).
+
+    time_to_first_token доступен только при потоковом ответе модели.
+    """
+    time_to_first_token: Optional[float]
+    time_to_proposal: float
+
+
 class Proposer(Protocol):
     """
     Протокол компонента, отвечающего за генерацию следующего действия агента.
@@ -13,16 +25,29 @@ class Proposer(Protocol):
     Proposer:
     - инкапсулирует взаимодействие с LLM;
     - анализирует пользовательский запрос и текущее состояние страницы;
-    - формирует структурированное предложение действия (ActionProposal).
+    - формирует структурированные предложения действий (ActionProposal).
 
     Не выполняет действий самостоятельно.
     """
+    last_timing: Optional[ProposalTiming]
+
     def __init__(self, config: 'RunConfig', timeout: int):
         pass
 
-    def get_proposal(self, user_prompt: str, page_snapshot: 'PageSnapshot') -> 'ActionProposal':
+    def reset(self) -> None:
+        """Начинает новый диалог с моделью: следующее предложение получит полное состояние"""
+
+    async def get_proposals(
+            self,
+            user_prompt: str,
+            page_snapshot: 'PageSnapshot',
+            action_error: Optional[str] = None,
+    ) -> list['ActionProposal']:
         """
-        Формирует предложение следующего действия агента.
+        Формирует предложение следующего шага агента.
 
-        Возвращает ActionProposal без побочных эффектов, на основании запроса пользователя и снапшота страницы.
+        Возвращает непустой список ActionProposal без побочных эффектов, на основании запроса
+        пользователя и снапшота страницы. Несколько предложений — серия действий без навигации
+        (например, заполнение полей одной формы), за которой может следовать одно завершающее.
+        action_error — ошибка выполнения предыдущего шага, если он не удался.
         """
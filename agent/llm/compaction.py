@@ -0,0 +1,144 @@
+import math
+import re
+import textwrap
+from collections import Counter
+from dataclasses import asdict
+from typing import TYPE_CHECKING, Any, Iterable, Sequence
+
+from agent.extractor.structures import ELEMENT_TARGETS
+
+if TYPE_CHECKING:
+    from agent.extractor.structures import PageSnapshot, ElementInfo
+
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+_TEXT_BLOCK_LEN = 300
+
+
+def tokenize(text: str) -> list[str]:
+    return _TOKEN_RE.findall(text.lower())
+
+
+def estimate_tokens(text: str) -> int:
+    """Грубая оценка числа токенов (~4 символа на токен), без обращения к токенизатору модели"""
+
+    return len(text) // 4 + 1
+
+
+class BM25Index:
+    """Индекс BM25 над небольшим набором документов (элементов одного снапшота)"""
+    def __init__(self, documents: Sequence[str], k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.terms = [Counter(tokenize(document)) for document in documents]
+        self.lengths = [sum(terms.values()) for terms in self.terms]
+        self.avg_length = (sum(self.lengths) / len(self.lengths)) if self.lengths else 0.0
+
+        frequencies = Counter()
+        for terms in self.terms:
+            frequencies.update(terms.keys())
+
+        total = len(self.terms)
+        self.idf = {
+            term: math.log(1 + (total - freq + 0.5) / (freq + 0.5))
+            for term, freq in frequencies.items()
+        }
+
+    def scores(self, query: str) -> list[float]:
+        query_terms = [term for term in set(tokenize(query)) if term in self.idf]
+        result = []
+        for terms, length in zip(self.terms, self.lengths):
+            norm = self.k1 * (1 - self.b + self.b * length / (self.avg_length or 1))
+            score = 0.0
+            for term in query_terms:
+                tf = terms.get(term, 0)
+                if tf:
+                    score += self.idf[term] * tf * (self.k1 + 1) / (tf + norm)
+            result.append(score)
+        return result
+
+
+def _element_document(target: str, item: 'ElementInfo') -> str:
+    match target:
+        case "links":
+            return f"{item.text} {item.href}"
+        case "inputs":
+            return f"{item.name} {item.placeholder} {item.input_type}"
+        case "buttons":
+            return f"{item.text} {item.aria_label}"
+        case "images":
+            return f"{item.alt} {item.title} {item.aria_label}"
+    return ""
+
+
+def split_text_blocks(text: str, block_len: int = _TEXT_BLOCK_LEN) -> list[str]:
+    """
+    Разбивает текст страницы на блоки до block_len символов.
+
+    Короткие строки объединяются, длинные — разбиваются по словам.
+    """
+
+    lines = (
+        chunk
+        for line in text.splitlines()
+        for chunk in textwrap.wrap(line, block_len, break_long_words=False)
+    )
+
+    blocks: list[str] = []
+    current = ""
+    for line in lines:
+        if current and len(current) + len(line) + 1 > block_len:
+            blocks.append(current)
+            current = ""
+        current = f"{current}\n{line}" if current else line
+    if current:
+        blocks.append(current)
+    return blocks
+
+
+def compact_snapshot_payload(
+        snapshot: 'PageSnapshot',
+        goal: str,
+        token_budget: int,
+) -> dict[str, Any]:
+    """
+    Формирует payload снапшота, укладывающийся в бюджет токенов.
+
+    Элементы и блоки текста ранжируются по релевантности цели пользователя (BM25)
+    и добавляются в порядке убывания релевантности, пока не исчерпан бюджет.
+    В итоговом payload сохраняется исходный порядок элементов на странице.
+    """
+
+    candidates: list[tuple[str, int, Any, str]] = []
+    for target in ELEMENT_TARGETS:
+        for position, item in enumerate(snapshot.elements(target)):
+            candidates.append((target, position, asdict(item), _element_document(target, item)))
+    for position, block in enumerate(split_text_blocks(snapshot.text)):
+        candidates.append(("text", position, block, block))
+
+    scores = BM25Index([document for *_, document in candidates]).scores(goal)
+    ranked = sorted(range(len(candidates)), key=lambda i: (-scores[i], candidates[i][1]))
+
+    budget = token_budget - estimate_tokens(f"{snapshot.url} {snapshot.title}")
+    selected: dict[str, list[tuple[int, Any]]] = {target: [] for target in (*ELEMENT_TARGETS, "text")}
+    for index in ranked:
+        target, position, value, _ = candidates[index]
+        cost = estimate_tokens(value if isinstance(value, str) else str(value))
+        if cost > budget:
+            continue
+        budget -= cost
+        selected[target].append((position, value))
+
+    payload: dict[str, Any] = {
+        "url": snapshot.url,
+        "title": snapshot.title,
+        "text": "\n".join(_in_page_order(selected["text"])),
+    }
+    for target in ELEMENT_TARGETS:
+        payload[target] = list(_in_page_order(selected[target]))
+    return payload
+
+
+def _in_page_order(items: Iterable[tuple[int, Any]]) -> Iterable[Any]:
+    return (value for _, value in sorted(items, key=lambda pair: pair[0]))
@@ -1,35 +1,245 @@
 import asyncio
+import logging
+import time
 
 import json
-from typing import TYPE_CHECKING, Any
+from typing import TYPE_CHECKING, Any, Iterator, Optional
 
-from openai import OpenAI
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
 
 from agent.navigator.actions.structures import ActionProposal, ActionType
+from agent.navigator.navigator import BATCHABLE_ACTIONS
 
+from agent.llm.base import ProposalTiming
+from agent.llm.payload import SnapshotEncoder
 from agent.llm.prompt import SYSTEM_PROMPT
 from agent.llm.tools import build_tool_specs
 
+from cli.config import PayloadMode
 from models import ApiKey
 
 if TYPE_CHECKING:
+    from openai import AsyncStream
     from cli.config import RunConfig
     from agent.extractor.extractor import PageSnapshot
 
 
+logger = logging.getLogger(__name__)
+
+_BATCHABLE_NAMES = frozenset(action.value for action in BATCHABLE_ACTIONS)
+
+_http_client: Optional[DefaultAsyncHttpxClient] = None
+
+
+def _shared_http_client() -> DefaultAsyncHttpxClient:
+    """
+    Общий HTTP клиент всех OpenAIProposer процесса.
+
+    Держит пул keep-alive соединений, чтобы запросы разных задач не открывали новые соединения.
+    """
+
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = DefaultAsyncHttpxClient()
+    return _http_client
+
+
 class OpenAIProposer:
     def __init__(self, config: 'RunConfig', timeout: int = 30):
         self.model = config.model
-        self.client = OpenAI(
-            api_key=asyncio.run(ApiKey.objects.get(name=config.provider)).value,
-            timeout=timeout
+        self.provider = config.provider
+        self.timeout = timeout
+        self._client: Optional[AsyncOpenAI] = None
+        self.encoder = SnapshotEncoder(
+            delta=config.payload_mode == PayloadMode.delta,
+            token_budget=config.token_budget,
+        )
+
+        self.stream = config.stream
+        self.last_timing: Optional[ProposalTiming] = None
+
+        self._previous_response_id: str | None = None
+        self._previous_call_ids: list[str] = []
+        self._skipped_call_ids: list[str] = []
+        self._pending_drain: Optional[asyncio.Task] = None
+
+    def reset(self) -> None:
+        """
+        Начинает новый диалог: следующий запрос отправит полное состояние без ссылки
+        на предыдущий ответ (и без результата его вызова инструмента)
+        """
+
+        self._previous_response_id = None
+        self._previous_call_ids = []
+        self._skipped_call_ids = []
+        self.encoder.reset()
+
+    async def get_client(self) -> AsyncOpenAI:
+        """Создаёт клиент при первом обращении, загружая API ключ из БД"""
+
+        if self._client is None:
+            api_key = await ApiKey.objects.get(name=self.provider)
+            self._client = AsyncOpenAI(
+                api_key=api_key.value,
+                timeout=self.timeout,
+                http_client=_shared_http_client(),
+            )
+        return self._client
+
+    async def get_proposals(
+            self,
+            user_prompt: str,
+            page_snapshot: 'PageSnapshot',
+            action_error: Optional[str] = None,
+    ) -> list['ActionProposal']:
+        started = time.perf_counter()
+        client = await self.get_client()
+        await self._wait_pending_drain()
+
+        if self._previous_response_id is None or not self._previous_call_ids:
+            self.reset()
+
+        is_delta, browser_state = self.encoder.encode(user_prompt, page_snapshot)
+        if is_delta:
+            request = self._build_delta_request(browser_state, action_error)
+        else:
+            request = self._build_full_request(user_prompt, browser_state, action_error)
+
+        if self.stream:
+            tool_calls, response_id, first_token_at = await self._stream_tool_calls(client, request)
+        else:
+            response = await client.responses.create(
+                model=self.model,
+                tools=build_tool_specs(),
+                tool_choice="required",
+                **request,
+            )
+            tool_calls = self._extract_tool_calls(response)
+            response_id, first_token_at = getattr(response, "id", None), None
+
+        proposals = [self._tool_call_to_proposal(tool_call) for tool_call in tool_calls]
+        proposed_at = time.perf_counter()
+
+        self._previous_response_id = response_id
+        self._previous_call_ids = [tool_call.get("call_id") for tool_call in tool_calls]
+        self._skipped_call_ids = []
+        self.last_timing = ProposalTiming(
+            time_to_first_token=first_token_at - started if first_token_at else None,
+            time_to_proposal=proposed_at - started,
         )
 
-    def get_proposal(self, user_prompt: str, page_snapshot: 'PageSnapshot') -> 'ActionProposal':
-        snapshot_payload = page_snapshot.to_payload()
-        response = self.client.responses.create(
+        return proposals
+
+    async def _stream_tool_calls(
+            self,
+            client: AsyncOpenAI,
+            request: dict[str, Any],
+    ) -> tuple[list[dict[str, Any]], str | None, float | None]:
+        """
+        Запрашивает ответ модели потоком и разбирает вызовы инструментов по мере поступления событий.
+
+        Вызов, завершающий серию действий, возвращается вместе с предыдущими сразу после получения
+        полных аргументов, не дожидаясь завершения ответа. Остаток потока дочитывается в фоне.
+        """
+
+        stream = await client.responses.create(
             model=self.model,
-            input=[
+            tools=build_tool_specs(),
+            tool_choice="required",
+            stream=True,
+            **request,
+        )
+
+        response_id = None
+        first_token_at = None
+        calls: dict[str, dict[str, Any]] = {}
+        completed: list[dict[str, Any]] = []
+
+        async for event in stream:
+            match getattr(event, "type", None):
+                case "response.created":
+                    response_id = event.response.id
+                case "response.output_item.added" if getattr(event.item, "type", None) == "function_call":
+                    calls[event.item.id] = {"name": event.item.name, "call_id": event.item.call_id}
+                case "response.function_call_arguments.delta" | "response.output_text.delta":
+                    first_token_at = first_token_at or time.perf_counter()
+                case "response.function_call_arguments.done":
+                    tool_call = calls.get(event.item_id, {})
+                    tool_call["arguments"] = event.arguments
+                    if not tool_call.get("name"):
+                        continue
+                    completed.append(tool_call)
+                    # Вызов, завершающий серию действий, возвращается сразу; после действий
+                    # серии (type, scroll, wait) могут последовать следующие вызовы
+                    if tool_call["name"] not in _BATCHABLE_NAMES:
+                        self._pending_drain = asyncio.create_task(self._drain_stream(stream))
+                        return completed, response_id, first_token_at or time.perf_counter()
+                case "response.failed" | "error":
+                    await stream.close()
+                    raise ValueError(f"Model response failed: {event}")
+
+        if not completed:
+            raise ValueError("No tool call returned by the model.")
+        return completed, response_id, first_token_at or time.perf_counter()
+
+    async def _drain_stream(self, stream: 'AsyncStream[Any]') -> None:
+        """
+        Дочитывает поток ответа, чтобы он завершился на стороне API.
+
+        Вызовы инструментов после завершающего серию не выполняются — следующий запрос
+        закрывает их соответствующим результатом. Ошибка дочитывания не прерывает задачу: ответ мог не сохраниться на стороне API,
+        поэтому следующий запрос начинает новый диалог с полным состоянием.
+        """
+
+        try:
+            try:
+                async for event in stream:
+                    if (
+                        getattr(event, "type", None) == "response.output_item.added"
+                        and getattr(event.item, "type", None) == "function_call"
+                    ):
+                        self._skipped_call_ids.append(event.item.call_id)
+            finally:
+                await stream.close()
+        except Exception:
+            logger.warning("Failed to drain model response stream", exc_info=True)
+            self._previous_response_id = None
+            self._previous_call_ids = []
+            self._skipped_call_ids = []
+
+    async def _wait_pending_drain(self) -> None:
+        """Дожидается завершения предыдущего ответа перед продолжением диалога"""
+
+        task, self._pending_drain = self._pending_drain, None
+        if task is not None:
+            await task
+
+    @staticmethod
+    def _build_full_request(
+            user_prompt: str,
+            browser_state: str,
+            action_error: Optional[str] = None,
+    ) -> dict[str, Any]:
+        """Запрос с полным состоянием браузера, начинающий новый диалог"""
+
+        content = [
+            {
+                "type": "input_text",
+                "text": f"User goal: {user_prompt}",
+            },
+            {
+                "type": "input_text",
+                "text": f"Browser state: {browser_state}",
+            },
+        ]
+        if action_error is not None:
+            content.append({
+                "type": "input_text",
+                "text": f"Previous action failed: {action_error}",
+            })
+
+        return {
+            "input": [
                 {
                     "role": "system",
                     "content": [
@@ -39,53 +249,86 @@ class OpenAIProposer:
                         },
                     ],
                 },
+                {
+                    "role": "user",
+                    "content": content,
+                },
+            ],
+        }
+
+    def _build_delta_request(self, browser_state: str, action_error: Optional[str] = None) -> dict[str, Any]:
+        """
+        Запрос с разницей состояния браузера.
+
+        Продолжает предыдущий ответ модели: закрывает её прошлые вызовы инструментов
+        (результатом выполнения или ошибкой серии действий) и передаёт только изменения
+        с последнего отправленного снапшота.
+        """
+
+        output = "Action executed." if action_error is None else f"Action failed: {action_error}"
+        return {
+            "previous_response_id": self._previous_response_id,
+            "input": [
+                *(
+                    {"type": "function_call_output", "call_id": call_id, "output": output}
+                    for call_id in self._previous_call_ids
+                ),
+                *(
+                    {"type": "function_call_output", "call_id": call_id, "output": "Not executed."}
+                    for call_id in self._skipped_call_ids
+                ),
                 {
                     "role": "user",
                     "content": [
                         {
                             "type": "input_text",
-                            "text": f"User goal: {user_prompt}",
-                        },
-                        {
-                            "type": "input_text",
-                            "text": f"Browser state: {json.dumps(snapshot_payload, ensure_ascii=True)}",
+                            "text": f"Browser state delta: {browser_state}",
                         },
                     ],
                 },
             ],
-            tools=build_tool_specs(),
-            tool_choice="required",
-        )
-        tool_call = self._extract_tool_call(response)
-        return self._tool_call_to_proposal(tool_call)
+        }
+
+    @staticmethod
+    def _extract_tool_calls(response: Any) -> list[dict[str, Any]]:
+        tool_calls = list(OpenAIProposer._iter_tool_calls(response))
+        if not tool_calls:
+            raise ValueError("No tool call returned by the model.")
+        return tool_calls
 
     @staticmethod
-    def _extract_tool_call(response: Any) -> dict[str, Any]:
+    def _iter_tool_calls(response: Any) -> Iterator[dict[str, Any]]:
         for item in getattr(response, "output", []):
             if isinstance(item, dict):
                 item_type = item.get("type")
                 if item_type in ("tool_call", "function_call"):
-                    return {"name": item.get("name"), "arguments": item.get("arguments")}
+                    yield {
+                        "name": item.get("name"),
+                        "arguments": item.get("arguments"),
+                        "call_id": item.get("call_id"),
+                    }
                 if item_type == "message":
                     for content in item.get("content", []):
                         if content.get("type") in ("tool_call", "function_call"):
-                            return {
+                            yield {
                                 "name": content.get("name"),
                                 "arguments": content.get("arguments"),
+                                "call_id": content.get("call_id"),
                             }
             if getattr(item, "type", None) in ("tool_call", "function_call"):
-                return {
+                yield {
                     "name": getattr(item, "name", None),
                     "arguments": getattr(item, "arguments", None),
+                    "call_id": getattr(item, "call_id", None),
                 }
             if getattr(item, "type", None) == "message":
                 for content in getattr(item, "content", []) or []:
                     if getattr(content, "type", None) in ("tool_call", "function_call"):
-                        return {
+                        yield {
                             "name": getattr(content, "name", None),
                             "arguments": getattr(content, "arguments", None),
+                            "call_id": getattr(content, "call_id", None),
                         }
-        raise ValueError("No tool call returned by the model.")
 
     @staticmethod
     def _tool_call_to_proposal(tool_call: dict[str, Any]) -> 'ActionProposal':
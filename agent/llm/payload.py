@@ -0,0 +1,130 @@
+import json
+from dataclasses import asdict, replace
+from typing import TYPE_CHECKING, Any, Optional
+
+from agent.extractor.structures import ELEMENT_TARGETS
+from agent.llm.compaction import compact_snapshot_payload
+
+if TYPE_CHECKING:
+    from agent.extractor.structures import PageSnapshot, SnapshotDiff
+
+
+def dump_payload(payload: dict[str, Any]) -> str:
+    return json.dumps(payload, ensure_ascii=True)
+
+
+def diff_to_payload(
+        snapshot: 'PageSnapshot',
+        diff: 'SnapshotDiff',
+        *,
+        max_text_len: int = 2000,
+) -> dict[str, Any]:
+    """
+    Формирует компактное представление разницы снапшотов для LLM.
+
+    Удалённые элементы передаются только своими element_id,
+    неизменившиеся элементы не передаются вовсе.
+    """
+
+    payload: dict[str, Any] = {"url": snapshot.url}
+    if diff.title_changed:
+        payload["title"] = snapshot.title
+    if diff.text_changed:
+        payload["text"] = snapshot.to_summary(max_text_len)
+
+    for key, groups in (("added", diff.added), ("changed", diff.changed)):
+        section = {
+            target: [asdict(item) for item in groups[target]]
+            for target in ELEMENT_TARGETS if groups.get(target)
+        }
+        if section:
+            payload[key] = section
+
+    removed = {
+        target: [item.element_id or item.selector for item in diff.removed[target]]
+        for target in ELEMENT_TARGETS if diff.removed.get(target)
+    }
+    if removed:
+        payload["removed"] = removed
+
+    return payload
+
+
+def _payload_key(item: dict[str, Any]) -> Any:
+    return item.get("element_id") or tuple(sorted(item.items()))
+
+
+def sent_view(snapshot: 'PageSnapshot', payload: dict[str, Any]) -> 'PageSnapshot':
+    """
+    Снапшот в том виде, в каком его получила модель: только элементы, вошедшие в payload
+    (после ограничения числа элементов или сжатия по бюджету), и отправленный текст.
+    """
+
+    elements = {}
+    for target in ELEMENT_TARGETS:
+        sent = {_payload_key(item) for item in payload.get(target, [])}
+        elements[target] = [item for item in snapshot.elements(target) if _payload_key(asdict(item)) in sent]
+    return replace(snapshot, text=payload.get("text", ""), diff=None, **elements)
+
+
+class SnapshotEncoder:
+    """
+    Кодировщик состояния браузера для промпта.
+
+    Полный снапшот отправляется один раз на страницу (и на цель пользователя),
+    далее — только разница с тем, что модель уже получила. Разница считается между
+    отправленными представлениями снапшотов (sent_view), а не полными снапшотами.
+    При заданном token_budget полный снапшот сжимается с ранжированием по цели.
+
+    Дельты продолжают диалог, и каждый запрос заново оплачивает весь его контекст.
+    Поэтому, как только суммарный размер дельт после последнего полного снапшота
+    превысил бы размер полного снапшота, вместо дельты снова отправляется полный
+    снапшот, начинающий новый диалог.
+    """
+    def __init__(self, delta: bool = True, token_budget: Optional[int] = None):
+        self.delta = delta
+        self.token_budget = token_budget
+        self._sent: Optional['PageSnapshot'] = None
+        self._goal: Optional[str] = None
+        self._chained = 0
+
+    def reset(self) -> None:
+        self._sent = None
+        self._goal = None
+        self._chained = 0
+
+    def encode(self, goal: str, snapshot: 'PageSnapshot') -> tuple[bool, str]:
+        """
+        Кодирует снапшот.
+
+        Возвращает признак дельты и текст состояния. Дельта не используется, если сменилась
+        страница или цель, либо если вместе с предыдущими дельтами диалога она не короче
+        полного снапшота.
+        """
+
+        if self.token_budget:
+            payload = compact_snapshot_payload(snapshot, goal, self.token_budget)
+        else:
+            payload = snapshot.to_payload()
+        full = dump_payload(payload)
+        view = sent_view(snapshot, payload)
+
+        previous = self._sent
+        can_delta = (
+            self.delta
+            and previous is not None
+            and self._goal == goal
+            and previous.url == snapshot.url
+        )
+
+        self._sent = view
+        self._goal = goal
+
+        if can_delta:
+            delta = dump_payload(diff_to_payload(view, view.diff_from(previous)))
+            if self._chained + len(delta) < len(full):
+                self._chained += len(delta)
+                return True, delta
+
+        self._chained = 0
+        return False, full
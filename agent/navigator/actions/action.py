@@ -5,6 +5,8 @@ from agent.navigator.actions.risk import assess_action_risk
 
 if TYPE_CHECKING:
     from agent.extractor.extractor import PageSnapshot
+    from agent.navigator.navigator import Navigator
+    from agent.navigator.actions.risk import RiskEngine
     from agent.navigator.actions.structures import ActionType, ActionRisk, ActionProposal
 
 
@@ -24,8 +26,10 @@ class Action:
         value: Optional[str],
         summary: str,
         snapshot: Optional['PageSnapshot'],
+        engine: Optional['RiskEngine'] = None,
     ) -> 'Action':
-        risk = assess_action_risk(
+        assess = engine.assess if engine is not None else assess_action_risk
+        risk = assess(
             action_type=action_type,
             selector=selector,
             value=value,
@@ -41,14 +45,21 @@ class Action:
         )
 
     @staticmethod
-    def from_proposal(proposal: 'ActionProposal', snapshot: Optional['PageSnapshot']) -> 'Action':
+    def from_proposal(
+        proposal: 'ActionProposal',
+        snapshot: Optional['PageSnapshot'],
+        engine: Optional['RiskEngine'] = None,
+    ) -> 'Action':
         return Action.with_assessed_risk(
             action_type=proposal.action_type,
             selector=proposal.selector,
             value=proposal.value,
             summary=proposal.summary,
             snapshot=snapshot,
+            engine=engine,
         )
 
-    def __call__(self):
-        ...
+    async def __call__(self, navigator: 'Navigator') -> None:
+        """Выполняет действие на странице навигатора"""
+
+        await navigator.execute(self)
@@ -1,83 +1,312 @@
-from typing import TYPE_CHECKING, Optional
+import os
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from functools import cache
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterable, Optional
 
+from agent.extractor.structures import ButtonInfo, InputInfo, LinkInfo
+from agent.navigator.actions.risk_rules import DEFAULT_RULES_PATH, RiskRules
 from agent.navigator.actions.structures import ActionType, ActionRisk
 
 if TYPE_CHECKING:
-    from agent.extractor.structures import PageSnapshot
-
-
-_DESTRUCTIVE_KEYWORDS = (
-    "delete",
-    "remove",
-    "erase",
-    "destroy",
-    "wipe",
-    "clear",
-    "reset",
-    "revoke",
-    "unsubscribe",
-    "cancel subscription",
-    "permanently",
-)
-
-_CONFIRM_KEYWORDS = (
-    "submit",
-    "send",
-    "save",
-    "confirm",
-    "approve",
-    "accept",
-    "apply",
-    "publish",
-    "post",
-    "checkout",
-    "purchase",
-    "pay",
-    "buy",
-    "register",
-    "sign up",
-    "sign in",
-    "log in",
-    "logout",
-    "sign out",
-    "update",
-    "change",
-    "join",
-)
-
-_SAFE_KEYWORDS = (
-    "search",
-    "view",
-    "learn more",
-    "details"
-)
+    from agent.extractor.structures import ElementInfo, PageSnapshot
+
+
+# Действия, которые не взаимодействуют с элементами страницы
+_SAFE_ACTIONS = frozenset({
+    ActionType.open,
+    ActionType.wait,
+    ActionType.back,
+    ActionType.forward,
+    ActionType.reload,
+    ActionType.scroll,
+    ActionType.snapshot,
+    ActionType.done,
+})
 
 
 def _normalize(text: str) -> str:
     return " ".join(text.lower().split())
 
 
-def _element_context(snapshot: 'PageSnapshot', selector: str) -> str:
-    for button in snapshot.buttons:
-        if button.selector == selector:
-            parts = [button.text, button.aria_label, button.button_type]
-            return _normalize(" ".join(p for p in parts if p))
+def _element_context(element: 'ElementInfo') -> str:
+    match element:
+        case ButtonInfo():
+            parts = [element.text, element.aria_label, element.button_type]
+        case LinkInfo():
+            parts = [element.text, element.href]
+        case InputInfo():
+            parts = [element.name, element.placeholder, element.input_type]
+        case _:
+            return ""
+    return _normalize(" ".join(p for p in parts if p))
+
+
+def _compile_keywords(keywords: Iterable[str]) -> Optional[re.Pattern]:
+    """Объединяет ключевые слова в одно регулярное выражение поиска подстроки"""
+
+    words = sorted({_normalize(keyword) for keyword in keywords if keyword.strip()}, key=len, reverse=True)
+    if not words:
+        return None
+    return re.compile("|".join(map(re.escape, words)))
+
+
+def _compile_patterns(patterns: Iterable[str]) -> Optional[re.Pattern]:
+    """Объединяет регулярные выражения в одно (без учёта регистра)"""
+
+    patterns = [pattern for pattern in patterns if pattern]
+    if not patterns:
+        return None
+    return re.compile("|".join(f"(?:{pattern})" for pattern in patterns), re.IGNORECASE)
+
+
+class KeywordMatcher:
+    """
+    Классификатор текста по категориям ключевых слов за один проход регулярного выражения.
+
+    Категории передаются в порядке приоритета; match возвращает самую приоритетную
+    категорию, ключевое слово которой встречается в тексте как подстрока.
+    """
+    def __init__(self, categories: dict[ActionRisk, Iterable[str]]):
+        self._groups: dict[str, tuple[int, ActionRisk]] = {}
+        alternatives = []
+        for rank, (risk, keywords) in enumerate(categories.items()):
+            pattern = _compile_keywords(keywords)
+            if pattern is None:
+                continue
+            group = f"c{rank}"
+            self._groups[group] = (rank, risk)
+            alternatives.append(f"(?P<{group}>{pattern.pattern})")
+
+        # Lookahead нулевой ширины проверяет каждую позицию, поэтому совпадения не "съедают"
+        # друг друга, а в одной позиции побеждает более приоритетная категория
+        self._pattern = re.compile(f"(?=(?:{"|".join(alternatives)}))") if alternatives else None
+
+    def match(self, text: str) -> Optional[ActionRisk]:
+        if self._pattern is None or not text:
+            return None
+
+        best: Optional[tuple[int, ActionRisk]] = None
+        for found in self._pattern.finditer(text):
+            candidate = self._groups[found.lastgroup]
+            if best is None or candidate[0] < best[0]:
+                best = candidate
+                if best[0] == 0:
+                    break
+        return best[1] if best else None
+
+
+@dataclass
+class _SnapshotIndex:
+    """Индекс элементов снапшота по селектору и кэш оценок риска для него"""
+
+    snapshot: 'PageSnapshot'
+    elements: dict[str, 'ElementInfo']
+    inputs: dict[str, InputInfo]
+    matchers: tuple[KeywordMatcher, ...] = ()
+    verdicts: dict[tuple, ActionRisk] = field(default_factory=dict)
+
+    @staticmethod
+    def build(snapshot: 'PageSnapshot', matchers: tuple[KeywordMatcher, ...]) -> '_SnapshotIndex':
+        elements = {}
+        # Приоритет при совпадении селекторов: кнопки, ссылки, поля ввода
+        for item in (*snapshot.buttons, *snapshot.links, *snapshot.inputs):
+            elements.setdefault(item.selector, item)
+
+        inputs = {}
+        for item in snapshot.inputs:
+            inputs.setdefault(item.selector, item)
+
+        return _SnapshotIndex(snapshot=snapshot, elements=elements, inputs=inputs, matchers=matchers)
+
+
+class RiskEngine:
+    """
+    Оценщик риска действий агента по правилам RiskRules.
+
+    Правила компилируются один раз: ключевые слова всех языков — в единый матчер,
+    override-правила — в отдельные матчеры, которые для подходящих URL проверяются раньше общего.
+    Для каждого снапшота один раз строится индекс элементов по селектору, а оценки кэшируются
+    по (действие, селектор, значение) в пределах снапшота. Хранятся индексы последних
+    cache_size снапшотов.
+
+    Если задан path, файл правил перечитывается при изменении (проверка не чаще
+    reload_interval секунд). Ошибка перезагрузки сохраняется в reload_error,
+    а действующие правила остаются прежними.
+    """
+    def __init__(
+            self,
+            rules: RiskRules,
+            *,
+            path: Optional[Path] = None,
+            reload_interval: float = 2.0,
+            cache_size: int = 4,
+    ):
+        self.path = path
+        self.reload_interval = reload_interval
+        self.cache_size = cache_size
+        self.reload_error: Optional[str] = None
+
+        self._mtime = self._stat_mtime()
+        self._checked_at = time.monotonic()
+        self._indexes: OrderedDict[int, _SnapshotIndex] = OrderedDict()
+        self._compile(rules)
+
+    @staticmethod
+    def from_file(path: Path, reload_interval: float = 2.0) -> 'RiskEngine':
+        return RiskEngine(RiskRules.load(path), path=Path(path), reload_interval=reload_interval)
+
+    def _compile(self, rules: RiskRules) -> None:
+        self.rules = rules
+        self.matcher = KeywordMatcher(rules.keywords)
+        self.overrides = [(override, KeywordMatcher(override.keywords)) for override in rules.overrides]
+        self.sensitive_inputs = _compile_patterns(rules.sensitive_inputs)
+        self.search_inputs = _compile_patterns(rules.search_inputs)
+        self._indexes.clear()
+
+    def _stat_mtime(self) -> Optional[float]:
+        if self.path is None:
+            return None
+        try:
+            return os.stat(self.path).st_mtime
+        except OSError:
+            return None
+
+    def reload_if_changed(self) -> bool:
+        """Перечитывает файл правил, если он изменился; возвращает True при перезагрузке"""
+
+        if self.path is None:
+            return False
+
+        self._checked_at = time.monotonic()
+        mtime = self._stat_mtime()
+        if mtime is None or mtime == self._mtime:
+            return False
+
+        self._mtime = mtime
+        try:
+            rules = RiskRules.load(self.path)
+        except ValueError as e:
+            self.reload_error = str(e)
+            return False
 
-    for link in snapshot.links:
-        if link.selector == selector:
-            parts = [link.text, link.href]
-            return _normalize(" ".join(p for p in parts if p))
+        self.reload_error = None
+        self._compile(rules)
+        return True
 
-    for input_info in snapshot.inputs:
-        if input_info.selector == selector:
-            parts = [input_info.name, input_info.placeholder, input_info.input_type]
-            return _normalize(" ".join(p for p in parts if p))
+    def assess(
+        self,
+        *,
+        action_type: 'ActionType',
+        selector: Optional[str],
+        value: Optional[str],
+        snapshot: Optional['PageSnapshot'],
+    ) -> 'ActionRisk':
+        if action_type in _SAFE_ACTIONS:
+            return ActionRisk.safe
+
+        if self.path is not None and time.monotonic() - self._checked_at >= self.reload_interval:
+            self.reload_if_changed()
+
+        if snapshot is None or not selector:
+            return self._assess(action_type, selector, value, None)
+
+        index = self._index(snapshot)
+        key = (action_type, selector, value)
+        verdict = index.verdicts.get(key)
+        if verdict is None:
+            verdict = index.verdicts[key] = self._assess(action_type, selector, value, index)
+        return verdict
+
+    def _index(self, snapshot: 'PageSnapshot') -> _SnapshotIndex:
+        # Индекс держит ссылку на снапшот, поэтому id не может быть переиспользован
+        key = id(snapshot)
+        index = self._indexes.get(key)
+        if index is not None and index.snapshot is snapshot:
+            self._indexes.move_to_end(key)
+            return index
+
+        index = self._indexes[key] = _SnapshotIndex.build(snapshot, self._matchers_for(snapshot.url))
+        while len(self._indexes) > self.cache_size:
+            self._indexes.popitem(last=False)
+        return index
+
+    def element_context(self, snapshot: Optional['PageSnapshot'], selector: Optional[str]) -> str:
+        """Нормализованный текстовый контекст элемента; пустая строка, если элемент не найден"""
+
+        if snapshot is None or not selector:
+            return ""
+        element = self._index(snapshot).elements.get(selector)
+        return _element_context(element) if element is not None else ""
+
+    def _matchers_for(self, url: Optional[str]) -> tuple[KeywordMatcher, ...]:
+        """Матчеры в порядке проверки: подходящие override-правила, затем общий"""
 
-    return ""
+        scoped = [matcher for override, matcher in self.overrides if url and override.matches(url)]
+        return (*scoped, self.matcher)
 
+    def _classify(self, text: str, matchers: tuple[KeywordMatcher, ...]) -> Optional[ActionRisk]:
+        """Категория текста по первому матчеру, нашедшему ключевое слово"""
 
-def _contains_any(text: str, keywords: tuple[str, ...]) -> bool:
-    return any(keyword in text for keyword in keywords)
+        for matcher in matchers:
+            category = matcher.match(text)
+            if category is not None:
+                return category
+        return None
+
+    def _assess(
+        self,
+        action_type: 'ActionType',
+        selector: Optional[str],
+        value: Optional[str],
+        index: Optional[_SnapshotIndex],
+    ) -> 'ActionRisk':
+        matchers = index.matchers if index else (self.matcher,)
+        element = index.elements.get(selector) if index else None
+        if element is not None:
+            category = self._classify(_element_context(element), matchers)
+            if category is not None:
+                return category
+
+        if action_type == ActionType.type:
+            input_info = index.inputs.get(selector) if index else None
+            if input_info is not None:
+                return self._assess_input(input_info)
+            return ActionRisk.confirm
+
+        if action_type in {ActionType.click, ActionType.press}:
+            if value and self._classify(_normalize(value), matchers) == ActionRisk.destructive:
+                return ActionRisk.destructive
+            return ActionRisk.confirm
+
+        return ActionRisk.confirm
+
+    def _assess_input(self, input_info: InputInfo) -> 'ActionRisk':
+        input_type = _normalize(input_info.input_type)
+        name = _normalize(input_info.name)
+        placeholder = _normalize(input_info.placeholder)
+        if input_type == "password":
+            return ActionRisk.confirm
+        if self.sensitive_inputs is not None and self.sensitive_inputs.search(name):
+            return ActionRisk.confirm
+        if input_type == "search":
+            return ActionRisk.safe
+        if self.search_inputs is not None and (self.search_inputs.search(name) or self.search_inputs.search(placeholder)):
+            return ActionRisk.safe
+        return ActionRisk.confirm
+
+
+@cache
+def load_risk_engine(path: Optional[Path] = None) -> RiskEngine:
+    """
+    Возвращает общий для процесса оценщик риска для файла правил
+    (по умолчанию — встроенный risk_rules.json).
+    """
+
+    return RiskEngine.from_file(path or DEFAULT_RULES_PATH)
 
 
 def assess_action_risk(
@@ -87,49 +316,9 @@ def assess_action_risk(
     value: Optional[str],
     snapshot: Optional['PageSnapshot'],
 ) -> 'ActionRisk':
-    if action_type in {
-        ActionType.open,
-        ActionType.wait,
-        ActionType.back,
-        ActionType.forward,
-        ActionType.reload,
-        ActionType.scroll,
-        ActionType.snapshot,
-        ActionType.done,
-    }:
-        return ActionRisk.safe
-
-    context = ""
-    if snapshot and selector:
-        context = _element_context(snapshot, selector)
-
-    if context:
-        if _contains_any(context, _DESTRUCTIVE_KEYWORDS):
-            return ActionRisk.destructive
-        if _contains_any(context, _CONFIRM_KEYWORDS):
-            return ActionRisk.confirm
-        if _contains_any(context, _SAFE_KEYWORDS):
-            return ActionRisk.safe
-
-    if action_type == ActionType.type:
-        if snapshot and selector:
-            for input_info in snapshot.inputs:
-                if input_info.selector == selector:
-                    input_type = _normalize(input_info.input_type)
-                    name = _normalize(input_info.name)
-                    placeholder = _normalize(input_info.placeholder)
-                    if "search" in name or "search" in placeholder or input_type == "search":
-                        return ActionRisk.safe
-                    if input_type == "password":
-                        return ActionRisk.confirm
-                    if any(keyword in name for keyword in ("card", "credit", "cvv", "ssn", "iban")):
-                        return ActionRisk.confirm
-                    break
-        return ActionRisk.confirm
-
-    if action_type in {ActionType.click, ActionType.press}:
-        if value and _contains_any(_normalize(value), _DESTRUCTIVE_KEYWORDS):
-            return ActionRisk.destructive
-        return ActionRisk.confirm
-
-    return ActionRisk.confirm
+    return load_risk_engine().assess(
+        action_type=action_type,
+        selector=selector,
+        value=value,
+        snapshot=snapshot,
+    )
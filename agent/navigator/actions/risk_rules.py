@@ -0,0 +1,124 @@
+import json
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Optional
+from urllib.parse import urlsplit
+
+from agent.navigator.actions.structures import ActionRisk
+
+
+RISK_RULES_VERSION = 1
+
+DEFAULT_RULES_PATH = Path(__file__).with_name("risk_rules.json")
+
+# Категории ключевых слов в порядке приоритета
+KEYWORD_CATEGORIES = (ActionRisk.destructive, ActionRisk.confirm, ActionRisk.safe)
+
+
+def _keyword_pack(data: dict[str, Any], where: str) -> dict[ActionRisk, tuple[str, ...]]:
+    pack = {}
+    for risk in KEYWORD_CATEGORIES:
+        keywords = data.get(risk.value, [])
+        if not isinstance(keywords, list) or not all(isinstance(k, str) for k in keywords):
+            raise ValueError(f'{where}: "{risk.value}" must be a list of strings')
+        pack[risk] = tuple(keywords)
+    return pack
+
+
+def _compile_pattern(pattern: str, where: str) -> re.Pattern:
+    try:
+        return re.compile(pattern)
+    except re.error as e:
+        raise ValueError(f'{where}: invalid regular expression "{pattern}": {e}') from e
+
+
+@dataclass(frozen=True)
+class RuleOverride:
+    """
+    Правила, действующие только на части сайтов.
+
+    Применяются, если URL снапшота подходит под domains (домен или его поддомен)
+    и url_pattern (регулярное выражение); ключевые слова override проверяются раньше общих.
+    """
+    domains: tuple[str, ...] = ()
+    url_pattern: Optional[re.Pattern] = None
+    keywords: dict[ActionRisk, tuple[str, ...]] = field(default_factory=dict)
+
+    def matches(self, url: str) -> bool:
+        if self.domains:
+            host = (urlsplit(url).hostname or "").lower()
+            if not any(host == domain or host.endswith(f".{domain}") for domain in self.domains):
+                return False
+        if self.url_pattern and not self.url_pattern.search(url):
+            return False
+        return True
+
+
+@dataclass(frozen=True)
+class RiskRules:
+    """
+    Правила оценки риска действий из файла правил (JSON).
+
+    Формат файла:
+    - version — версия формата (RISK_RULES_VERSION);
+    - locales — пакеты ключевых слов по языкам: {"ru": {"destructive": [...], "confirm": [...], "safe": [...]}};
+    - inputs — регулярные выражения имён полей ввода: "sensitive" (всегда подтверждение)
+      и "search" (безопасный ввод);
+    - overrides — правила для доменов/URL: {"domains": [...], "url_pattern": "...", "safe": [...], ...}.
+
+    Ключевые слова ищутся как подстроки нормализованного текста элемента (удобно задавать
+    основы слов: "удал", "lösch"). Пакеты всех языков объединяются в один набор.
+    """
+    keywords: dict[ActionRisk, tuple[str, ...]]
+    sensitive_inputs: tuple[str, ...] = ()
+    search_inputs: tuple[str, ...] = ()
+    overrides: tuple[RuleOverride, ...] = ()
+    locales: tuple[str, ...] = ()
+
+    @staticmethod
+    def load(path: Path) -> 'RiskRules':
+        """Загружает и проверяет файл правил"""
+
+        try:
+            data = json.loads(Path(path).read_text(encoding="utf-8"))
+        except (OSError, ValueError) as e:
+            raise ValueError(f"Cannot read risk rules from {path}: {e}") from e
+        return RiskRules.from_dict(data)
+
+    @staticmethod
+    def from_dict(data: dict[str, Any]) -> 'RiskRules':
+        version = data.get("version")
+        if version != RISK_RULES_VERSION:
+            raise ValueError(f"Unsupported risk rules version: {version!r} (expected {RISK_RULES_VERSION})")
+
+        keywords: dict[ActionRisk, list[str]] = {risk: [] for risk in KEYWORD_CATEGORIES}
+        locales = data.get("locales", {})
+        for locale, pack in locales.items():
+            for risk, words in _keyword_pack(pack, f"locale {locale}").items():
+                keywords[risk].extend(words)
+
+        inputs = data.get("inputs", {})
+        for kind in ("sensitive", "search"):
+            for pattern in inputs.get(kind, []):
+                _compile_pattern(pattern, f"inputs.{kind}")
+
+        overrides = []
+        for i, item in enumerate(data.get("overrides", [])):
+            domains = tuple(domain.lower().lstrip(".") for domain in item.get("domains", []))
+            url_pattern = item.get("url_pattern")
+            if not domains and not url_pattern:
+                raise ValueError(f'override {i}: "domains" or "url_pattern" is required')
+            overrides.append(RuleOverride(
+                domains=domains,
+                url_pattern=_compile_pattern(url_pattern, f"override {i}") if url_pattern else None,
+                keywords=_keyword_pack(item, f"override {i}"),
+            ))
+
+        return RiskRules(
+            keywords={risk: tuple(words) for risk, words in keywords.items()},
+            sensitive_inputs=tuple(inputs.get("sensitive", [])),
+            search_inputs=tuple(inputs.get("search", [])),
+            overrides=tuple(overrides),
+            locales=tuple(locales),
+        )
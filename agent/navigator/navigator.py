@@ -1,2 +1,221 @@
+import asyncio
+import re
+from typing import TYPE_CHECKING, Optional, Sequence
+
+from playwright.async_api import Error as PlaywrightError
+
+from agent.extractor.scripts import ELEMENT_ID_ATTRIBUTE, MUTATION_QUIET_JS, RESOLVE_CSS_PATH_JS
+from agent.navigator.actions.structures import ActionType
+
+if TYPE_CHECKING:
+    from playwright.async_api import Frame, Page, Request
+    from agent.navigator.actions import Action
+
+
+# Действия, выполняемые внутри текущей страницы без навигации — их можно выполнять пакетом
+BATCHABLE_ACTIONS = frozenset({ActionType.type, ActionType.scroll, ActionType.wait})
+
+_KEY_ALIASES = {
+    "ctrl": "Control",
+    "control": "Control",
+    "cmd": "Meta",
+    "command": "Meta",
+    "meta": "Meta",
+    "alt": "Alt",
+    "option": "Alt",
+    "shift": "Shift",
+    "esc": "Escape",
+    "return": "Enter",
+}
+
+# Селектор-дескриптор элемента по element_id, который получают неуникальные элементы снапшота
+_HANDLE_RE = re.compile(rf'\[{re.escape(ELEMENT_ID_ATTRIBUTE)}="(\d+)"\]')
+
+_SCROLL_JS = """
+direction => {
+    const step = Math.round(window.innerHeight * 0.8);
+    switch (direction) {
+        case 'up': window.scrollBy(0, -step); break;
+        case 'top': window.scrollTo(0, 0); break;
+        case 'bottom': window.scrollTo(0, document.documentElement.scrollHeight); break;
+        default: window.scrollBy(0, step);
+    }
+}
+"""
+
+
+class _NavigationWatcher:
+    """Отслеживает начало и фиксацию навигации основного фрейма во время действия"""
+    def __init__(self, page: 'Page'):
+        self.page = page
+        self.requested = False
+        self.committed = asyncio.Event()
+
+    def __enter__(self) -> '_NavigationWatcher':
+        self.page.on("request", self._on_request)
+        self.page.on("framenavigated", self._on_frame_navigated)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.page.remove_listener("request", self._on_request)
+        self.page.remove_listener("framenavigated", self._on_frame_navigated)
+
+    def _on_request(self, request: 'Request') -> None:
+        if request.is_navigation_request() and request.frame == self.page.main_frame:
+            self.requested = True
+
+    def _on_frame_navigated(self, frame: 'Frame') -> None:
+        if frame == self.page.main_frame:
+            self.committed.set()
+
+
 class Navigator:
-    ...
+    """
+    Исполнитель действий агента на странице Playwright.
+
+    Вместо фиксированных пауз после каждого действия ожидает:
+    - загрузки DOM нового документа, если действие привело к навигации;
+    - затишья мутаций DOM, если страница изменилась на месте.
+    """
+    def __init__(
+            self,
+            page: 'Page',
+            *,
+            action_timeout_ms: int = 10_000,
+            settle_quiet_ms: int = 150,
+            settle_timeout_ms: int = 3_000,
+    ):
+        self.page = page
+        self.action_timeout_ms = action_timeout_ms
+        self.settle_quiet_ms = settle_quiet_ms
+        self.settle_timeout_ms = settle_timeout_ms
+
+    async def execute(self, action: 'Action') -> None:
+        """Выполняет действие и дожидается стабилизации страницы"""
+
+        with _NavigationWatcher(self.page) as watcher:
+            await self._perform(action)
+            await self._settle(watcher)
+
+    async def execute_batch(self, actions: Sequence['Action']) -> None:
+        """
+        Выполняет последовательность действий без ожидания стабилизации между ними.
+
+        Все действия, кроме последнего, должны выполняться без навигации (BATCHABLE_ACTIONS).
+        Стабилизация страницы ожидается один раз — после последнего действия.
+        """
+
+        if not actions:
+            return
+
+        for action in actions[:-1]:
+            if action.action_type not in BATCHABLE_ACTIONS:
+                raise ValueError(f'Action "{action.action_type.value}" cannot be batched.')
+
+        with _NavigationWatcher(self.page) as watcher:
+            for action in actions:
+                await self._perform(action)
+            await self._settle(watcher)
+
+    async def _perform(self, action: 'Action') -> None:
+        page = self.page
+        timeout = self.action_timeout_ms
+
+        match action.action_type:
+            case ActionType.open:
+                await page.goto(self._normalize_url(action.value), wait_until="domcontentloaded", timeout=timeout)
+            case ActionType.click:
+                await page.click(await self._resolve_selector(action), timeout=timeout)
+            case ActionType.type:
+                await page.fill(await self._resolve_selector(action), action.value or "", timeout=timeout)
+            case ActionType.press:
+                key = self._normalize_key(action.value)
+                if action.selector:
+                    await page.press(await self._resolve_selector(action), key, timeout=timeout)
+                else:
+                    await page.keyboard.press(key)
+            case ActionType.wait:
+                await self._wait_dom_quiet(timeout_ms=self._parse_wait(action.value))
+            case ActionType.back:
+                await page.go_back(wait_until="domcontentloaded", timeout=timeout)
+            case ActionType.forward:
+                await page.go_forward(wait_until="domcontentloaded", timeout=timeout)
+            case ActionType.reload:
+                await page.reload(wait_until="domcontentloaded", timeout=timeout)
+            case ActionType.scroll:
+                await page.evaluate(_SCROLL_JS, (action.value or "down").strip().lower())
+            case ActionType.snapshot | ActionType.done:
+                pass
+
+    async def _settle(self, watcher: _NavigationWatcher) -> None:
+        """Ожидает стабилизации страницы после действия"""
+
+        if not watcher.requested and not watcher.committed.is_set():
+            try:
+                await self._wait_dom_quiet(timeout_ms=self.settle_timeout_ms)
+            except PlaywrightError:
+                # Контекст выполнения уничтожен — действие запустило навигацию
+                pass
+
+        if watcher.requested or watcher.committed.is_set():
+            try:
+                await asyncio.wait_for(watcher.committed.wait(), self.settle_timeout_ms / 1000)
+            except TimeoutError:
+                return
+            await self.page.wait_for_load_state("domcontentloaded", timeout=self.action_timeout_ms)
+
+    async def _wait_dom_quiet(self, timeout_ms: int) -> None:
+        await self.page.evaluate(
+            MUTATION_QUIET_JS,
+            {"quietMs": min(self.settle_quiet_ms, timeout_ms), "timeoutMs": timeout_ms},
+        )
+
+    async def _resolve_selector(self, action: 'Action') -> str:
+        """
+        Селектор элемента действия.
+
+        Если узел с element_id селектора-дескриптора исчез (страница перерисовала его без
+        повторного снапшота), используется CSS путь, сохранённый при сборе, — при условии,
+        что он по-прежнему указывает ровно на один элемент.
+        """
+
+        selector = self._require_selector(action)
+        match = _HANDLE_RE.fullmatch(selector.strip())
+        if match is None or await self.page.locator(selector).count():
+            return selector
+
+        path = await self.page.evaluate(RESOLVE_CSS_PATH_JS, match.group(1))
+        if path and await self.page.locator(path).count() == 1:
+            return path
+        return selector
+
+    @staticmethod
+    def _require_selector(action: 'Action') -> str:
+        if not action.selector:
+            raise ValueError(f'Action "{action.action_type.value}" requires a selector.')
+        return action.selector
+
+    @staticmethod
+    def _normalize_url(url: Optional[str]) -> str:
+        if not url:
+            raise ValueError('Action "open" requires a URL.')
+        url = url.strip()
+        if "://" not in url and not url.startswith(("about:", "data:")):
+            url = f"https://{url}"
+        return url
+
+    @staticmethod
+    def _normalize_key(value: Optional[str]) -> str:
+        """Приводит сочетание клавиш к формату Playwright (Ctrl+L → Control+L)"""
+
+        if not value:
+            raise ValueError('Action "press" requires a key.')
+        parts = [part.strip() for part in value.split("+") if part.strip()]
+        return "+".join(_KEY_ALIASES.get(part.lower(), part) for part in parts)
+
+    @staticmethod
+    def _parse_wait(value: Optional[str]) -> int:
+        try:
+            return max(int(float(value or 0)), 0)
+        except ValueError:
+            return 0
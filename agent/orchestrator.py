@@ -1,19 +1,86 @@
-from typing import TYPE_CHECKING, Optional, Protocol, Any
+import asyncio
+import time
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+from enum import Enum
+from functools import partial
+from typing import TYPE_CHECKING, Optional, Protocol, Any, Sequence
 
+from playwright.async_api import Error as PlaywrightError
+
+from agent.approval import ApprovalCache, ApprovalKey, ApprovalPolicy, Confirmation
+from agent.extractor import Extractor
+from agent.extractor.policy import default_policies
+from agent.extractor.prefetch import SnapshotPrefetcher
+from agent.extractor.readiness import ReadinessCheck
 from agent.navigator.actions import Action
-from agent.navigator.actions.structures import ActionRisk
+from agent.navigator.actions.risk import load_risk_engine
+from agent.navigator.navigator import Navigator
+from agent.navigator.actions.structures import ActionRisk, ActionType
 from cli.config import Provider
 
 from agent.llm.anthropic_proposer import ClaudeProposer
 from agent.llm.openai_proposer import OpenAIProposer
 
 if TYPE_CHECKING:
+    from playwright.async_api import Page
     from agent.llm.base import Proposer
     from cli.config import RunConfig
     from agent.extractor.extractor import PageSnapshot
     from agent.navigator.actions.structures import ActionProposal
 
 
+# Сколько раз подряд допускается повтор одного и того же действия на неизменившейся странице
+_MAX_NOOP_REPEATS = 2
+
+# Сколько действий подряд может завершиться ошибкой, прежде чем задача будет остановлена
+_MAX_ACTION_FAILURES = 3
+
+
+@dataclass(frozen=True)
+class StepTiming:
+    """Длительность фаз одного шага агента (в секундах)"""
+    step: int
+    snapshot: float
+    proposal: float
+    execution: float
+    time_to_first_token: Optional[float] = None
+    error: Optional[str] = None
+
+    def __str__(self) -> str:
+        parts = [
+            f"step {self.step}",
+            f"snapshot {self.snapshot:.2f}s",
+            f"proposal {self.proposal:.2f}s",
+            f"action {self.execution:.2f}s",
+        ]
+        if self.time_to_first_token is not None:
+            parts.append(f"ttft {self.time_to_first_token:.2f}s")
+        if self.error is not None:
+            parts.append(f"failed: {self.error}")
+        return " · ".join(parts)
+
+
+class RunStatus(str, Enum):
+    done = "done"
+    declined = "declined"
+    stalled = "stalled"
+    step_limit = "step_limit"
+    failed = "failed"
+
+
+@dataclass(frozen=True)
+class RunResult:
+    """Итог выполнения задачи агентом"""
+    status: RunStatus
+    summary: str = ""
+    timings: list[StepTiming] = field(default_factory=list)
+
+    @property
+    def steps(self) -> int:
+        return len(self.timings)
+
+
 class IOManager(Protocol):
     """
     Протокол слоя пользовательского вывода.
@@ -32,8 +99,12 @@ class ClarificationManager(Protocol):
     Применяется для потенциально рискованных или необратимых действий агента.
     """
     @staticmethod
-    def confirm(text: str) -> bool:
-        """Запрашивает подтверждение действия у пользователя"""
+    def confirm(text: str, allow_always: bool = False) -> 'Confirmation':
+        """
+        Запрашивает подтверждение действия у пользователя.
+
+        При allow_always=True пользователь может одобрить действие «всегда на этом сайте».
+        """
 
     @staticmethod
     def ask(text: str) -> str:
@@ -54,7 +125,9 @@ class Orchestrator:
             self,
             config: 'RunConfig',
             io_manager: Optional['IOManager'] = None,
-            clarification_manager: Optional['ClarificationManager'] = None
+            clarification_manager: Optional['ClarificationManager'] = None,
+            page: Optional['Page'] = None,
+            llm_limiter: Optional[asyncio.Semaphore] = None,
     ) -> None:
 
         self.cfg = config
@@ -62,30 +135,154 @@ class Orchestrator:
         self.clarification_manager = clarification_manager
 
         self.llm_proposer = self._build_llm_proposer()
+        self.llm_limiter = llm_limiter
 
-    async def run(self, task: str) -> None:
+        self.extractor = Extractor(
+            page,
+            policies=default_policies(viewport_only=config.viewport_only),
+            readiness=ReadinessCheck.from_config(config),
+        ) if page else None
+        self.navigator = Navigator(page) if page else None
+        self.risk_engine = load_risk_engine(config.risk_rules)
+        self.approvals = ApprovalCache(ApprovalPolicy.load(config.approval_policy) if config.approval_policy else None)
+        self._last_snapshot: Optional['PageSnapshot'] = None
+        self.timings: list[StepTiming] = []
+
+    async def run(self, task: str) -> RunResult:
         """
         Основная корутина.
 
-        Запускает в работу агента, информирует и опрашивает пользователя о действиях агента
-        при наличии io_manager и clarification_manager.
+        Выполняет цикл observe → propose → act, пока агент не сообщит о завершении задачи,
+        не будет исчерпан лимит шагов (RunConfig.max_steps), агент не начнёт повторять
+        действие, не меняющее страницу, или несколько действий подряд не завершатся ошибкой.
+        Ошибка действия передаётся модели вместе со следующим состоянием страницы.
+        Информирует и опрашивает пользователя о действиях агента при наличии io_manager
+        и clarification_manager.
         """
         if not task or not task.strip():
             raise ValueError('Task cannot be empty.')
 
-        page_snapshot = await self._get_page_snapshot(task)
+        self.timings = []
+        # Последнее действие прошлой задачи могло быть отклонено или не выполнено —
+        # диалог с моделью начинается заново
+        self.llm_proposer.reset()
+
+        prefetcher = None
+        if self.cfg.prefetch:
+            prefetcher = SnapshotPrefetcher(
+                partial(self._get_page_snapshot, task),
+                interval=self.cfg.warm_interval_ms / 1000,
+            )
+
+        try:
+            return await self._run_steps(task, prefetcher)
+        finally:
+            if prefetcher:
+                await prefetcher.close()
+
+    async def _run_steps(self, task: str, prefetcher: Optional[SnapshotPrefetcher]) -> RunResult:
+        """
+        Цикл шагов агента.
+
+        При наличии prefetcher снапшот обновляется в фоне, пока модель формирует предложение,
+        а сбор снапшота после действия начинается сразу и идёт параллельно с выводом в UI.
+        Действие строится по снапшоту, который видела модель; если за это время элемент
+        действия изменился, действие пропускается и страница наблюдается заново.
+        Серия действий (заполнение полей одной формы) проверяется и подтверждается по одному
+        действию, а выполняется одним шагом с однократным ожиданием стабилизации страницы.
+        """
+
+        previous_key = None
+        repeats = 0
+        action_error = None
+        failures = 0
+
+        for step in range(1, self.cfg.max_steps + 1):
+            started = time.perf_counter()
+            if prefetcher:
+                page_snapshot = await prefetcher.get()
+                prefetcher.start_warming()
+            else:
+                page_snapshot = await self._get_page_snapshot(task)
+            observed = time.perf_counter()
+
+            try:
+                async with self.llm_limiter or nullcontext():
+                    proposals = await self.llm_proposer.get_proposals(task, page_snapshot, action_error)
+            finally:
+                if prefetcher:
+                    await prefetcher.stop_warming()
+            proposed = time.perf_counter()
+
+            actions = [self._build_action(proposal, page_snapshot) for proposal in proposals]
+            if actions[0].action_type == ActionType.done:
+                self._print(actions[0].summary)
+                return RunResult(RunStatus.done, actions[0].summary, self.timings)
+            # Завершение задачи после серии действий модель подтвердит по следующему снапшоту
+            actions = [action for action in actions if action.action_type != ActionType.done]
+            summary = "; ".join(action.summary for action in actions)
 
-        proposal = self.llm_proposer.get_proposal(task, page_snapshot)
-        action = self._build_action(proposal, page_snapshot)
+            # Предложение сделано по устаревшему состоянию: действия не выполняются, шаг считается
+            # неудавшимся, а модель получает свежий снапшот и объяснение на следующем шаге
+            stale = prefetcher is not None and any(
+                self._target_changed(action, page_snapshot, prefetcher.latest) for action in actions
+            )
+            if stale:
+                self._print(f"{summary} (page changed, re-observing)")
+            else:
+                key = (
+                    tuple((action.action_type, action.selector, action.value) for action in actions),
+                    page_snapshot.state_hash(),
+                )
+                repeats = repeats + 1 if key == previous_key else 0
+                previous_key = key
+                if repeats > _MAX_NOOP_REPEATS:
+                    summary = f'Stopped: "{summary}" does not change the page.'
+                    self._print(summary)
+                    return RunResult(RunStatus.stalled, summary, self.timings)
 
-        if self.clarification_manager and self._requires_confirmation(action):
-            if not self.clarification_manager.confirm(action.summary):
-                return
+                for action in actions:
+                    if self.clarification_manager and self._requires_confirmation(action):
+                        if not await self._confirm(action, page_snapshot):
+                            return RunResult(RunStatus.declined, action.summary, self.timings)
 
-        elif self.io_manager:
-            self.io_manager.print(action.summary)
+                    else:
+                        self._print(action.summary)
 
-        await self._invoke_action(action)
+            acting = time.perf_counter()
+            if stale:
+                action_error = "Not executed: the target element changed while you were deciding."
+            else:
+                action_error = await self._invoke_actions(actions)
+            executed = time.perf_counter()
+
+            if prefetcher:
+                prefetcher.schedule()
+
+            timing = StepTiming(
+                step=step,
+                snapshot=observed - started,
+                proposal=proposed - observed,
+                execution=executed - acting,
+                time_to_first_token=getattr(self.llm_proposer.last_timing, 'time_to_first_token', None),
+                error=action_error,
+            )
+            self.timings.append(timing)
+            self._print(str(timing))
+
+            failures = failures + 1 if action_error is not None else 0
+            if failures >= _MAX_ACTION_FAILURES:
+                summary = f'Stopped: {failures} actions in a row failed, last: "{summary}": {action_error}'
+                self._print(summary)
+                return RunResult(RunStatus.failed, summary, self.timings)
+
+        summary = f'Stopped: step limit ({self.cfg.max_steps}) reached.'
+        self._print(summary)
+        return RunResult(RunStatus.step_limit, summary, self.timings)
+
+    def _print(self, text: str) -> None:
+        if self.io_manager:
+            self.io_manager.print(text)
 
     def _build_llm_proposer(self) -> 'Proposer':
         match self.cfg.provider:
@@ -94,11 +291,27 @@ class Orchestrator:
             case Provider.anthropic:
                 return ClaudeProposer(self.cfg)
 
-    @staticmethod
-    def _build_action(proposal: 'ActionProposal', page_snapshot: 'PageSnapshot') -> Action:
+    def _build_action(self, proposal: 'ActionProposal', page_snapshot: 'PageSnapshot') -> Action:
         """Преобразует предложение действия в исполняемое действие агента"""
 
-        return Action.from_proposal(proposal, page_snapshot)
+        return Action.from_proposal(proposal, page_snapshot, engine=self.risk_engine)
+
+    def _target_changed(
+            self,
+            action: Action,
+            observed: 'PageSnapshot',
+            latest: Optional['PageSnapshot'],
+    ) -> bool:
+        """Изменился ли (или исчез) элемент действия в снапшоте, обновлённом после предложения"""
+
+        if latest is None or latest is observed or not action.selector:
+            return False
+        if latest.url != observed.url:
+            return True
+        return (
+            self.risk_engine.element_context(observed, action.selector)
+            != self.risk_engine.element_context(latest, action.selector)
+        )
 
     @staticmethod
     def _requires_confirmation(action: Action) -> bool:
@@ -106,8 +319,57 @@ class Orchestrator:
 
         return action.risk in {ActionRisk.confirm, ActionRisk.destructive}
 
+    async def _confirm(self, action: Action, page_snapshot: Optional['PageSnapshot']) -> bool:
+        """
+        Подтверждает действие: по политике или запомненному одобрению — без вопроса,
+        иначе запрашивает пользователя и запоминает ответ «всегда на этом сайте».
+        """
+
+        key = ApprovalKey.for_action(action, page_snapshot, self.risk_engine)
+        if await self.approvals.is_approved(key, action.risk):
+            self._print(f"{action.summary} (auto-approved)")
+            return True
+
+        decision = self.clarification_manager.confirm(action.summary, allow_always=key.rememberable)
+        if decision == Confirmation.always:
+            await self.approvals.remember(key, action.risk)
+        return decision in (Confirmation.approve, Confirmation.always)
+
     async def _get_page_snapshot(self, task: str) -> 'PageSnapshot':
-        """Получает актуальный снапшот страницы перед принятием решения"""
+        """
+        Получает актуальный снапшот страницы перед принятием решения.
+
+        В инкрементальном режиме повторно собираются только изменившиеся DOM объекты.
+        """
+
+        if self.extractor is None:
+            raise RuntimeError('Browser page is not attached.')
+
+        if self.cfg.incremental_snapshots:
+            snapshot = await self.extractor.extract_incremental(self._last_snapshot)
+        else:
+            snapshot = await self.extractor.extract()
+
+        self._last_snapshot = snapshot
+        return snapshot
+
+    async def _invoke_actions(self, actions: Sequence[Action]) -> Optional[str]:
+        """
+        Выполняет действие агента или серию действий одним пакетом.
+
+        Возвращает текст ошибки, если действия не удалось выполнить (таймаут, неоднозначный
+        или устаревший селектор, некорректные параметры или недопустимая серия), иначе None.
+        """
+
+        if self.navigator is None:
+            raise RuntimeError('Browser page is not attached.')
 
-    async def _invoke_action(self, action: Action) -> None:
-        """Выполняет действие агента"""
+        try:
+            if len(actions) == 1:
+                await actions[0](self.navigator)
+            else:
+                await self.navigator.execute_batch(actions)
+        except (PlaywrightError, ValueError) as e:
+            # Первая строка сообщения Playwright — суть ошибки, далее идёт журнал вызова
+            return str(e).strip().splitlines()[0] if str(e).strip() else type(e).__name__
+        return None
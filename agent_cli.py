@@ -1,6 +1,7 @@
 import asyncio
 
 from cli.app import app
+from orm.db import db
 from orm.model import init_models
 
 
@@ -13,6 +14,13 @@ from orm.model import init_models
 """
 
 
+async def bootstrap() -> None:
+    try:
+        await init_models()
+    finally:
+        await db.close()
+
+
 if __name__ == "__main__":
-    asyncio.run(init_models())
+    asyncio.run(bootstrap())
     app()
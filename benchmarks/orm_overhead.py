@@ -0,0 +1,85 @@
+"""
+Микробенчмарк накладных расходов ORM на один запрос.
+
+Сравнивает:
+- построение SQL заново и получение его из кэша QuerySet;
+- горячий поиск filter(name=...).exists() без кэша подготовленных запросов и с ним.
+
+Запуск: python -m benchmarks.orm_overhead [--iterations N]
+"""
+import argparse
+import asyncio
+import tempfile
+import time
+from pathlib import Path
+
+from orm.db import db
+from orm.fields import IntegerField, TextField
+from orm.model import Model, create_tables
+
+
+class BenchKey(Model):
+    id = IntegerField(primary_key=True)
+    name = TextField(index=True)
+    value = TextField()
+
+
+def _per_call_us(started: float, iterations: int) -> float:
+    return (time.perf_counter() - started) / iterations * 1_000_000
+
+
+def bench_sql_build(iterations: int) -> tuple[float, float]:
+    """Время построения SQL для filter(name=...): без кэша и из кэша, мкс на вызов"""
+
+    qs = BenchKey.objects.filter(name="openai")
+
+    started = time.perf_counter()
+    for _ in range(iterations):
+        qs._build_sql("exists")
+    uncached = _per_call_us(started, iterations)
+
+    started = time.perf_counter()
+    for _ in range(iterations):
+        qs._sql("exists")
+    cached = _per_call_us(started, iterations)
+
+    return uncached, cached
+
+
+async def bench_lookup(path: Path, iterations: int, statement_cache_size: int) -> float:
+    """Время горячего BenchKey.objects.filter(name=...).exists(), мкс на вызов"""
+
+    db.path = str(path)
+    db.statement_cache_size = statement_cache_size
+    try:
+        await create_tables([BenchKey])
+        if not await BenchKey.objects.exists():
+            await BenchKey.objects.bulk_create(BenchKey(name=f"key-{i}", value="x") for i in range(1_000))
+
+        for _ in range(100):  # прогрев пула и кэшей
+            await BenchKey.objects.filter(name="key-500").exists()
+
+        started = time.perf_counter()
+        for i in range(iterations):
+            await BenchKey.objects.filter(name=f"key-{i % 1_000}").exists()
+        return _per_call_us(started, iterations)
+    finally:
+        await db.close()
+
+
+async def main(iterations: int) -> None:
+    uncached, cached = bench_sql_build(iterations * 10)
+    print(f"SQL build:  uncached {uncached:8.2f} us/call   cached {cached:8.2f} us/call")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "bench.sqlite3"
+        cold = await bench_lookup(path, iterations, statement_cache_size=0)
+        warm = await bench_lookup(path, iterations, statement_cache_size=256)
+    print(f"exists():   no stmt cache {cold:8.2f} us/call   stmt cache {warm:8.2f} us/call")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=2_000)
+    args = parser.parse_args()
+    asyncio.run(main(args.iterations))
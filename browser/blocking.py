@@ -0,0 +1,120 @@
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+from urllib.parse import urlsplit
+
+if TYPE_CHECKING:
+    from playwright.async_api import BrowserContext, Route
+    from cli.config import RunConfig
+
+
+# Распространённые домены рекламы и аналитики (--block-trackers)
+TRACKER_DOMAINS = (
+    "doubleclick.net",
+    "googlesyndication.com",
+    "googletagmanager.com",
+    "googletagservices.com",
+    "google-analytics.com",
+    "adservice.google.com",
+    "connect.facebook.net",
+    "hotjar.com",
+    "mc.yandex.ru",
+    "top-fwz1.mail.ru",
+    "scorecardresearch.com",
+    "criteo.com",
+    "taboola.com",
+    "outbrain.com",
+    "adnxs.com",
+    "amazon-adsystem.com",
+    "segment.io",
+    "mixpanel.com",
+)
+
+
+def _normalize_domain(domain: str) -> str:
+    return domain.strip().lower().lstrip(".")
+
+
+def _matches(host: str, domains: tuple[str, ...]) -> bool:
+    return any(host == domain or host.endswith("." + domain) for domain in domains)
+
+
+@dataclass
+class ResourceBlocker:
+    """
+    Блокировка тяжёлых ресурсов на уровне контекста браузера.
+
+    Запросы отклоняются по типу ресурса (image, font, media, ...) и по домену;
+    домены из allow_domains не блокируются никогда, документы — тоже.
+    Метаданные изображений (src, alt) при этом сохраняются: они берутся из DOM.
+    """
+    resource_types: frozenset[str] = frozenset()
+    deny_domains: tuple[str, ...] = ()
+    allow_domains: tuple[str, ...] = ()
+    blocked: int = 0
+    _host_verdicts: dict[str, bool | None] = field(default_factory=dict, repr=False)
+
+    @staticmethod
+    def from_config(config: 'RunConfig') -> 'ResourceBlocker':
+        deny = [*config.block_domains, *(TRACKER_DOMAINS if config.block_trackers else ())]
+        return ResourceBlocker(
+            resource_types=frozenset(resource.value for resource in config.block_resources),
+            deny_domains=tuple(_normalize_domain(domain) for domain in deny),
+            allow_domains=tuple(_normalize_domain(domain) for domain in config.allow_domains),
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.resource_types or self.deny_domains)
+
+    def should_block(self, url: str, resource_type: str) -> bool:
+        if resource_type == "document":
+            return False
+
+        host_verdict = self._host_verdict(urlsplit(url).hostname or "")
+        if host_verdict is not None:
+            return host_verdict
+        return resource_type in self.resource_types
+
+    def _host_verdict(self, host: str) -> bool | None:
+        """True — домен запрещён, False — явно разрешён, None — правил для домена нет"""
+
+        if host not in self._host_verdicts:
+            if _matches(host, self.allow_domains):
+                verdict = False
+            elif _matches(host, self.deny_domains):
+                verdict = True
+            else:
+                verdict = None
+            self._host_verdicts[host] = verdict
+        return self._host_verdicts[host]
+
+    def route_patterns(self) -> tuple[str, ...]:
+        """
+        URL шаблоны перехватываемых запросов.
+
+        Перехваченные запросы браузер не берёт из своего HTTP кэша, поэтому при блокировке
+        только по доменам перехватываются лишь запросы к этим доменам. Тип ресурса по URL
+        не определить — блокировка по типу перехватывает все запросы.
+        """
+
+        if self.resource_types:
+            return ("**/*",)
+        return tuple(
+            pattern
+            for domain in self.deny_domains
+            for pattern in (f"*://{domain}/**", f"*://*.{domain}/**")
+        )
+
+    async def install(self, context: 'BrowserContext') -> None:
+        """Подключает блокировку к запросам контекста (см. route_patterns)"""
+
+        for pattern in self.route_patterns():
+            await context.route(pattern, self._handle)
+
+    async def _handle(self, route: 'Route') -> None:
+        request = route.request
+        if self.should_block(request.url, request.resource_type):
+            self.blocked += 1
+            await route.abort("blockedbyclient")
+        else:
+            await route.fallback()
@@ -0,0 +1,249 @@
+import asyncio
+import hashlib
+import json
+import os
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterable, Optional
+
+from playwright.async_api import Error as PlaywrightError
+
+if TYPE_CHECKING:
+    from playwright.async_api import APIResponse, BrowserContext, Request, Route
+    from cli.config import RunConfig
+
+
+CACHEABLE_RESOURCE_TYPES = frozenset({"script", "stylesheet", "font", "image"})
+
+# Заголовки, которые нельзя переиспользовать: тело в кэше хранится уже раскодированным
+_DROPPED_HEADERS = frozenset({"content-encoding", "content-length", "transfer-encoding", "set-cookie"})
+
+_MAX_AGE_RE = re.compile(r"max-age=(\d+)")
+
+
+@dataclass
+class CacheEntry:
+    key: str
+    url: str
+    status: int
+    headers: dict[str, str]
+    vary: list[str]
+    expires_at: float
+    size: int
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    stores: int = 0
+    evictions: int = 0
+
+    def __str__(self) -> str:
+        total = self.hits + self.misses
+        ratio = self.hits / total if total else 0.0
+        return f"{self.hits} hits, {self.misses} misses ({ratio:.0%}), {self.stores} stored, {self.evictions} evicted"
+
+
+class HttpCache:
+    """
+    Дисковый кэш HTTP ответов для контекста браузера.
+
+    Отдаёт GET ответы статических ресурсов (скрипты, стили, шрифты, изображения) из каталога
+    профиля без обращения к сети. Ключ — URL и значения заголовков из Vary ответа.
+    Записи живут не дольше ttl_seconds (и не дольше max-age ответа), общий размер ограничен
+    max_bytes с вытеснением давно не использованных записей (LRU).
+    """
+    def __init__(
+            self,
+            directory: Path,
+            *,
+            max_bytes: int = 256 * 1024 * 1024,
+            ttl_seconds: int = 24 * 60 * 60,
+            resource_types: Iterable[str] = CACHEABLE_RESOURCE_TYPES,
+    ):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.resource_types = frozenset(resource_types)
+        self.stats = CacheStats()
+
+        self._entries: OrderedDict[str, CacheEntry] = OrderedDict()
+        self._vary: dict[str, list[str]] = {}
+        self._size = 0
+        self._loaded = False
+
+    @staticmethod
+    def from_config(config: 'RunConfig') -> Optional['HttpCache']:
+        if not config.http_cache:
+            return None
+        return HttpCache(
+            Path(config.profile_dir) / "http-cache",
+            max_bytes=config.http_cache_max_mb * 1024 * 1024,
+            ttl_seconds=config.http_cache_ttl_s,
+        )
+
+    async def install(self, context: 'BrowserContext') -> None:
+        """Подключает кэш ко всем запросам контекста"""
+
+        if not self._loaded:
+            await asyncio.to_thread(self._load)
+            self._loaded = True
+        await context.route("**/*", self._handle)
+
+    async def _handle(self, route: 'Route') -> None:
+        request = route.request
+        if request.method != "GET" or request.resource_type not in self.resource_types:
+            await route.fallback()
+            return
+
+        entry = self._lookup(request)
+        if entry is not None:
+            try:
+                body = await asyncio.to_thread(self._read, entry.key)
+            except OSError:
+                # Файл тела удалён (параллельное вытеснение или извне) — запрос идёт в сеть
+                self._evict(entry.key)
+            else:
+                self.stats.hits += 1
+                await route.fulfill(status=entry.status, headers=entry.headers, body=body)
+                return
+
+        self.stats.misses += 1
+        try:
+            response = await route.fetch()
+        except PlaywrightError:
+            await route.fallback()
+            return
+
+        ttl = self._ttl(response)
+        if ttl:
+            body = await response.body()
+            await self._store(request, response, body, ttl)
+        await route.fulfill(response=response)
+
+    def _lookup(self, request: 'Request') -> Optional[CacheEntry]:
+        vary = self._vary.get(request.url)
+        if vary is None:
+            return None
+
+        key = self._key(request.url, vary, request.headers)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at < time.time():
+            self._evict(key)
+            return None
+
+        self._entries.move_to_end(key)
+        return entry
+
+    def _ttl(self, response: 'APIResponse') -> int:
+        """Срок хранения ответа в секундах; 0 — ответ кэшировать нельзя"""
+
+        if response.status != 200:
+            return 0
+
+        headers = response.headers
+        if headers.get("vary", "").strip() == "*":
+            return 0
+
+        cache_control = headers.get("cache-control", "").lower()
+        if any(directive in cache_control for directive in ("no-store", "no-cache", "private")):
+            return 0
+
+        max_age = _MAX_AGE_RE.search(cache_control)
+        if max_age:
+            return min(int(max_age.group(1)), self.ttl_seconds)
+        return self.ttl_seconds
+
+    async def _store(self, request: 'Request', response: 'APIResponse', body: bytes, ttl: int) -> None:
+        vary = sorted(
+            name.strip().lower()
+            for name in response.headers.get("vary", "").split(",")
+            if name.strip()
+        )
+        key = self._key(request.url, vary, request.headers)
+        entry = CacheEntry(
+            key=key,
+            url=request.url,
+            status=response.status,
+            headers={k: v for k, v in response.headers.items() if k.lower() not in _DROPPED_HEADERS},
+            vary=vary,
+            expires_at=time.time() + ttl,
+            size=len(body),
+        )
+        if entry.size > self.max_bytes:
+            return
+
+        await asyncio.to_thread(self._write, entry, body)
+
+        if key in self._entries:
+            self._size -= self._entries.pop(key).size
+        self._entries[key] = entry
+        self._vary[entry.url] = vary
+        self._size += entry.size
+        self.stats.stores += 1
+
+        while self._size > self.max_bytes and self._entries:
+            self._evict(next(iter(self._entries)))
+            self.stats.evictions += 1
+
+    def _evict(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self._size -= entry.size
+        for path in (self._body_path(key), self._meta_path(key)):
+            path.unlink(missing_ok=True)
+
+    @staticmethod
+    def _key(url: str, vary: list[str], headers: dict[str, str]) -> str:
+        parts = [url, *(f"{name}:{headers.get(name, '')}" for name in vary)]
+        return hashlib.sha256("\n".join(parts).encode()).hexdigest()
+
+    def _body_path(self, key: str) -> Path:
+        return self.directory / f"{key}.body"
+
+    def _meta_path(self, key: str) -> Path:
+        return self.directory / f"{key}.json"
+
+    def _write(self, entry: CacheEntry, body: bytes) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._body_path(entry.key).write_bytes(body)
+        self._meta_path(entry.key).write_text(json.dumps(asdict(entry)), encoding="utf-8")
+
+    def _read(self, key: str) -> bytes:
+        body = self._body_path(key).read_bytes()
+        os.utime(self._meta_path(key))
+        return body
+
+    def _load(self) -> None:
+        """Восстанавливает индекс кэша с диска; порядок LRU — по времени изменения файлов"""
+
+        if not self.directory.exists():
+            return
+
+        now = time.time()
+        loaded = []
+        for meta_path in self.directory.glob("*.json"):
+            try:
+                entry = CacheEntry(**json.loads(meta_path.read_text(encoding="utf-8")))
+            except (OSError, ValueError, TypeError):
+                meta_path.unlink(missing_ok=True)
+                continue
+
+            body_path = self._body_path(entry.key)
+            if entry.expires_at < now or not body_path.exists():
+                meta_path.unlink(missing_ok=True)
+                body_path.unlink(missing_ok=True)
+                continue
+            loaded.append((os.path.getmtime(meta_path), entry))
+
+        for _, entry in sorted(loaded, key=lambda pair: pair[0]):
+            self._entries[entry.key] = entry
+            self._vary[entry.url] = entry.vary
+            self._size += entry.size
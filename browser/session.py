@@ -1,10 +1,170 @@
+import asyncio
+from pathlib import Path
+from typing import TYPE_CHECKING, Optional
+
+from playwright.async_api import async_playwright
+
+from browser.blocking import ResourceBlocker
+from browser.http_cache import HttpCache
+from cli.config import Browser
+
+if TYPE_CHECKING:
+    from playwright.async_api import Browser as PlaywrightBrowser, BrowserContext, BrowserType, Page, Playwright
+    from cli.config import RunConfig
+
+
 class BrowserSession:
-    def __init__(self):
-        ...
+    """
+    Браузерная сессия агента.
 
-    def __enter__(self):
-        ...
+    Запускает браузер один раз на процесс и держит пул заранее открытых страниц,
+    которые задачи берут (acquire) и возвращают (release) вместо холодного запуска браузера.
+
+    Режимы:
+    - по умолчанию — постоянный профиль (RunConfig.profile_dir), страницы общего контекста;
+    - isolated=True — общий браузер, каждая выданная страница живёт в собственном
+      изолированном контексте, который закрывается при возврате.
+    """
+    def __init__(self, config: 'RunConfig', pool_size: int = 1, isolated: bool = False):
+        self.cfg = config
+        self.pool_size = pool_size
+        self.isolated = isolated
+        self.blocker = ResourceBlocker.from_config(config)
+        self.http_cache = HttpCache.from_config(config)
+
+        self._playwright: Optional['Playwright'] = None
+        self._browser: Optional['PlaywrightBrowser'] = None
+        self._context: Optional['BrowserContext'] = None
+        self._pool: asyncio.Queue['Page'] = asyncio.Queue()
+        self._lock = asyncio.Lock()
+        self._started = False
+
+    async def __aenter__(self) -> 'BrowserSession':
+        await self.start()
         return self
 
-    def __exit__(self, exc_type, exc_val, exc_tb):
-        ...
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        await self.close()
+
+    @property
+    def context(self) -> 'BrowserContext':
+        if self._context is None:
+            raise RuntimeError('Browser session has no shared context.')
+        return self._context
+
+    async def start(self) -> None:
+        """Запускает браузер и прогревает пул страниц (повторный вызов ничего не делает)"""
+
+        async with self._lock:
+            if self._started:
+                return
+
+            self._playwright = await async_playwright().start()
+            if self.isolated:
+                await self._start_isolated()
+            else:
+                await self._start_persistent()
+            self._started = True
+
+    async def _start_persistent(self) -> None:
+        profile_dir = Path(self.cfg.profile_dir)
+        profile_dir.mkdir(parents=True, exist_ok=True)
+
+        self._context = await self._browser_type().launch_persistent_context(
+            str(profile_dir),
+            headless=self.cfg.headless,
+        )
+        await self._install_routes(self._context)
+        if self.cfg.trace:
+            await self._context.tracing.start(screenshots=True, snapshots=True)
+
+        # Постоянный контекст открывается с одной пустой страницей — используем её в пуле
+        pages = list(self._context.pages)
+        while len(pages) < self.pool_size:
+            pages.append(await self._context.new_page())
+        for page in pages:
+            self._pool.put_nowait(page)
+
+    async def _start_isolated(self) -> None:
+        self._browser = await self._browser_type().launch(headless=self.cfg.headless)
+        pages = await asyncio.gather(*(self._new_isolated_page() for _ in range(self.pool_size)))
+        for page in pages:
+            self._pool.put_nowait(page)
+
+    async def _new_isolated_page(self) -> 'Page':
+        context = await self._browser.new_context()
+        await self._install_routes(context)
+        return await context.new_page()
+
+    async def _install_routes(self, context: 'BrowserContext') -> None:
+        """
+        Подключает перехват запросов контекста.
+
+        Playwright вызывает обработчики в порядке, обратном регистрации: блокировка
+        срабатывает первой, и только незаблокированные запросы доходят до HTTP кэша.
+        """
+
+        if self.http_cache:
+            await self.http_cache.install(context)
+        await self.blocker.install(context)
+
+    async def acquire(self) -> 'Page':
+        """Выдаёт страницу из пула, открывая новую, если пул пуст"""
+
+        await self.start()
+        while not self._pool.empty():
+            page = self._pool.get_nowait()
+            if not page.is_closed():
+                return page
+
+        if self.isolated:
+            return await self._new_isolated_page()
+        return await self.context.new_page()
+
+    async def release(self, page: 'Page') -> None:
+        """
+        Возвращает страницу в пул для следующих задач.
+
+        В изолированном режиме контекст страницы закрывается, а пул пополняется новым.
+        """
+
+        if self.isolated:
+            await page.context.close()
+            if self._browser is not None and self._pool.qsize() < self.pool_size:
+                self._pool.put_nowait(await self._new_isolated_page())
+            return
+
+        if page.is_closed():
+            return
+        if self._pool.qsize() >= self.pool_size:
+            await page.close()
+            return
+        self._pool.put_nowait(page)
+
+    async def close(self) -> None:
+        """Закрывает браузер и освобождает ресурсы Playwright"""
+
+        async with self._lock:
+            if self._context is not None:
+                if self.cfg.trace:
+                    await self._context.tracing.stop(path=str(Path(self.cfg.profile_dir) / "trace.zip"))
+                await self._context.close()
+                self._context = None
+
+            if self._browser is not None:
+                await self._browser.close()
+                self._browser = None
+
+            if self._playwright is not None:
+                await self._playwright.stop()
+                self._playwright = None
+
+            self._pool = asyncio.Queue()
+            self._started = False
+
+    def _browser_type(self) -> 'BrowserType':
+        match self.cfg.browser:
+            case Browser.firefox:
+                return self._playwright.firefox
+            case _:
+                return self._playwright.chromium
@@ -1,6 +1,7 @@
 import typer
 
 import asyncio
+import json
 
 from pathlib import Path
 from typing import Optional
@@ -8,8 +9,10 @@ from typing import Optional
 from rich.text import Text
 
 from agent.orchestrator import Orchestrator
+from browser.session import BrowserSession
+from cli.batch import load_tasks, run_batch
 
-from cli.config import Provider, Browser, RunConfig
+from cli.config import Provider, Browser, Readiness, PayloadMode, ResourceType, RunConfig
 from cli.io import Console, CLIUserIO, CLIClarificationIO
 from cli.ui.enter_api_key import enter_api_key
 from cli.ui.get_task import get_task
@@ -17,6 +20,7 @@ from cli.ui.panel import show_main_panel
 from cli.ui.styles import STYLES
 
 from models import ApiKey
+from orm.db import db
 
 
 app = typer.Typer(add_completion=False, no_args_is_help=True)
@@ -31,7 +35,47 @@ def run(
     browser: Browser = typer.Option(Browser.chrome, '--browser', '-b'),
     profile: Path = typer.Option(Path('profiles/user1'), '--profile'),
     max_steps: int = typer.Option(80, '--max-steps'),
-    trace: bool = typer.Option(False, '--trace', help='Enable Playwright tracing (if implemented)'),
+    trace: bool = typer.Option(False, '--trace', help='Record a Playwright trace into the profile directory'),
+    headless: bool = typer.Option(False, '--headless', help='Run the browser without a window'),
+    readiness: Readiness = typer.Option(Readiness.networkidle, '--readiness', help='Page readiness strategy'),
+    readiness_timeout: int = typer.Option(30_000, '--readiness-timeout', help='Readiness timeout in ms'),
+    quiet_window: int = typer.Option(500, '--quiet-window', help='DOM quiet window in ms (mutation_quiet)'),
+    incremental: bool = typer.Option(
+        True, '--incremental/--full-snapshots', help='Re-extract only changed DOM subtrees between steps',
+    ),
+    viewport_only: bool = typer.Option(
+        False, '--viewport-only', help='Extract only visible elements inside the viewport',
+    ),
+    payload_mode: PayloadMode = typer.Option(
+        PayloadMode.delta, '--payload-mode', help='Send full browser state every step or only its delta',
+    ),
+    token_budget: Optional[int] = typer.Option(
+        None, '--token-budget', help='Approximate token budget for the browser state (ranked by the task)',
+    ),
+    stream: bool = typer.Option(True, '--stream/--no-stream', help='Stream model responses'),
+    prefetch: bool = typer.Option(
+        True, '--prefetch/--no-prefetch', help='Refresh page snapshots in the background while the model thinks',
+    ),
+    block: Optional[list[ResourceType]] = typer.Option(
+        None, '--block',
+        help='Resource type to block, can be repeated (image, font, media, ...). '
+             'Intercepts every request, so the browser HTTP cache is bypassed (see --http-cache)',
+    ),
+    block_domain: Optional[list[str]] = typer.Option(None, '--block-domain', help='Domain to block, can be repeated'),
+    allow_domain: Optional[list[str]] = typer.Option(
+        None, '--allow-domain', help='Domain never blocked, can be repeated',
+    ),
+    block_trackers: bool = typer.Option(False, '--block-trackers', help='Block common ad and analytics domains'),
+    http_cache: bool = typer.Option(
+        False, '--http-cache', help='Serve static resources from an on-disk cache in the profile directory',
+    ),
+    http_cache_max_mb: int = typer.Option(256, '--http-cache-max-mb', min=1, help='HTTP cache size limit in MB'),
+    risk_rules: Optional[Path] = typer.Option(
+        None, '--risk-rules', exists=True, dir_okay=False, help='JSON file with risk rules (reloaded on change)',
+    ),
+    approval_policy: Optional[Path] = typer.Option(
+        None, '--approval-policy', exists=True, dir_okay=False, help='JSON file with pre-approved action patterns',
+    ),
 ):
     """
     Runs browser surfing agent
@@ -43,32 +87,159 @@ def run(
         profile_dir=profile,
         max_steps=max_steps,
         trace=trace,
+        headless=headless,
+        readiness=readiness,
+        readiness_timeout_ms=readiness_timeout,
+        quiet_window_ms=quiet_window,
+        incremental_snapshots=incremental,
+        viewport_only=viewport_only,
+        payload_mode=payload_mode,
+        token_budget=token_budget,
+        stream=stream,
+        prefetch=prefetch,
+        block_resources=block or [],
+        block_domains=block_domain or [],
+        allow_domains=allow_domain or [],
+        block_trackers=block_trackers,
+        http_cache=http_cache,
+        http_cache_max_mb=http_cache_max_mb,
+        risk_rules=risk_rules,
+        approval_policy=approval_policy,
     )
 
     async def run_cli():
+        try:
+            await interactive()
+        finally:
+            await db.close()
+
+    async def interactive():
         show_main_panel(cfg)
 
         if not await ApiKey.objects.filter(name=cfg.provider).exists():
-            enter_api_key(cfg)
+            await enter_api_key(cfg)
+
+        async with BrowserSession(cfg) as session:
+            page = await session.acquire()
+            orchestrator = Orchestrator(
+                config=cfg,
+                io_manager=CLIUserIO(),
+                clarification_manager=CLIClarificationIO(),
+                page=page,
+            )
+
+            current_task = task
+            if current_task:
+                console.print(Text.assemble((">> ", STYLES.secondary), (current_task, STYLES.primary)))
+
+            try:
+                while True:
+                    current_task = current_task or get_task()
+                    if not current_task:
+                        break
+                    await orchestrator.run(current_task)
+                    current_task = None
+            finally:
+                await session.release(page)
+
+        if session.http_cache:
+            console.print(Text(f"HTTP cache: {session.http_cache.stats}", style=STYLES.secondary))
+
+    try:
+        asyncio.run(run_cli())
+    except KeyboardInterrupt:
+        console.print('\nInterrupted by user.')
+
+
+@app.command('run-batch')
+def run_batch_command(
+    tasks_file: Path = typer.Argument(..., exists=True, dir_okay=False, help='JSONL file with tasks'),
+    concurrency: int = typer.Option(4, '--concurrency', '-c', min=1, help='Tasks executed in parallel'),
+    llm_concurrency: Optional[int] = typer.Option(
+        None, '--llm-concurrency', min=1, help='Max in-flight LLM requests (defaults to --concurrency)',
+    ),
+    output: Optional[Path] = typer.Option(None, '--output', '-o', help='Write per-task results as JSONL'),
+    approve_all: bool = typer.Option(
+        False, '--approve-all', help='Approve risky actions not covered by --approval-policy instead of stopping the task',
+    ),
+    provider: Provider = typer.Option(Provider.openai, '--provider', '-p'),
+    model: str = typer.Option('gpt-4.1', '--model', '-m'),
+    browser: Browser = typer.Option(Browser.chrome, '--browser', '-b'),
+    max_steps: int = typer.Option(80, '--max-steps'),
+    headless: bool = typer.Option(True, '--headless/--headed', help='Run the browser without a window'),
+    token_budget: Optional[int] = typer.Option(
+        None, '--token-budget', help='Approximate token budget for the browser state (ranked by the task)',
+    ),
+    block: Optional[list[ResourceType]] = typer.Option(
+        None, '--block',
+        help='Resource type to block, can be repeated (image, font, media, ...). '
+             'Intercepts every request, so the browser HTTP cache is bypassed (see --http-cache)',
+    ),
+    block_domain: Optional[list[str]] = typer.Option(None, '--block-domain', help='Domain to block, can be repeated'),
+    allow_domain: Optional[list[str]] = typer.Option(
+        None, '--allow-domain', help='Domain never blocked, can be repeated',
+    ),
+    block_trackers: bool = typer.Option(False, '--block-trackers', help='Block common ad and analytics domains'),
+    risk_rules: Optional[Path] = typer.Option(
+        None, '--risk-rules', exists=True, dir_okay=False, help='JSON file with risk rules (reloaded on change)',
+    ),
+    approval_policy: Optional[Path] = typer.Option(
+        None, '--approval-policy', exists=True, dir_okay=False, help='JSON file with pre-approved action patterns',
+    ),
+):
+    """
+    Runs independent tasks in parallel, each in an isolated browser context
+    """
+    cfg = RunConfig(
+        provider=provider,
+        model=model,
+        browser=browser,
+        profile_dir=Path('profiles/batch'),
+        max_steps=max_steps,
+        trace=False,
+        headless=headless,
+        token_budget=token_budget,
+        block_resources=block or [],
+        block_domains=block_domain or [],
+        allow_domains=allow_domain or [],
+        block_trackers=block_trackers,
+        risk_rules=risk_rules,
+        approval_policy=approval_policy,
+    )
 
-        orchestrator = Orchestrator(
-            config=cfg,
-            io_manager=CLIUserIO(),
-            clarification_manager=CLIClarificationIO(),
+    async def run_batch_cli():
+        try:
+            await batch()
+        finally:
+            await db.close()
+
+    async def batch():
+        if not await ApiKey.objects.filter(name=cfg.provider).exists():
+            await enter_api_key(cfg)
+
+        tasks = load_tasks(tasks_file)
+        results = await run_batch(
+            cfg,
+            tasks,
+            concurrency=concurrency,
+            llm_concurrency=llm_concurrency,
+            approve=approve_all,
         )
 
-        current_task = task
-        if current_task:
-            console.print(Text.assemble((">> ", STYLES.secondary), (current_task, STYLES.primary)))
+        for result in results:
+            console.print(Text.assemble(
+                (f"[{result['id']}] ", STYLES.secondary),
+                (f"{result['status']} ", STYLES.warning if result['status'] != 'done' else STYLES.primary),
+                (f"{result['steps']} steps, {result['elapsed']:.1f}s ", STYLES.secondary),
+                (result['summary'], STYLES.primary),
+            ))
 
-        while True:
-            current_task = current_task or get_task()
-            if not current_task:
-                break
-            await orchestrator.run(current_task)
-            current_task = None
+        if output:
+            with output.open('w', encoding='utf-8') as f:
+                for result in results:
+                    f.write(json.dumps(result, ensure_ascii=False) + '\n')
 
     try:
-        asyncio.run(run_cli())
+        asyncio.run(run_batch_cli())
     except KeyboardInterrupt:
         console.print('\nInterrupted by user.')
@@ -0,0 +1,90 @@
+import asyncio
+import json
+import time
+from dataclasses import asdict
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Optional
+
+from agent.orchestrator import Orchestrator
+from browser.session import BrowserSession
+from cli.io import BatchClarificationIO, CLITaskIO
+
+if TYPE_CHECKING:
+    from cli.config import RunConfig
+
+
+def load_tasks(path: Path) -> list[dict[str, str]]:
+    """
+    Загружает задачи из JSONL файла.
+
+    Каждая строка — объект {"task": ..., "id": ...} (id необязателен) либо JSON-строка с задачей.
+    """
+
+    tasks = []
+    with path.open(encoding="utf-8") as f:
+        for line_no, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+
+            item = json.loads(line)
+            if isinstance(item, str):
+                item = {"task": item}
+            if not isinstance(item, dict) or not str(item.get("task", "")).strip():
+                raise ValueError(f"{path}:{line_no}: task is missing")
+
+            tasks.append({"id": str(item.get("id", line_no)), "task": item["task"]})
+    return tasks
+
+
+async def run_batch(
+        cfg: 'RunConfig',
+        tasks: list[dict[str, str]],
+        *,
+        concurrency: int,
+        llm_concurrency: Optional[int] = None,
+        approve: bool = False,
+) -> list[dict[str, Any]]:
+    """
+    Выполняет независимые задачи параллельно.
+
+    Каждая задача получает собственный изолированный контекст общего браузера;
+    число одновременных запросов к LLM ограничено общим семафором.
+    """
+
+    task_slots = asyncio.Semaphore(concurrency)
+    llm_limiter = asyncio.Semaphore(llm_concurrency or concurrency)
+
+    async with BrowserSession(cfg, pool_size=concurrency, isolated=True) as session:
+        async def run_one(item: dict[str, str]) -> dict[str, Any]:
+            async with task_slots:
+                started = time.perf_counter()
+                page = await session.acquire()
+                try:
+                    orchestrator = Orchestrator(
+                        config=cfg,
+                        io_manager=CLITaskIO(item["id"]),
+                        clarification_manager=BatchClarificationIO(approve),
+                        page=page,
+                        llm_limiter=llm_limiter,
+                    )
+                    result = await orchestrator.run(item["task"])
+                    outcome = {
+                        "status": result.status.value,
+                        "summary": result.summary,
+                        "steps": result.steps,
+                        "timings": [asdict(timing) for timing in result.timings],
+                    }
+                except Exception as e:
+                    outcome = {"status": "error", "summary": f"{type(e).__name__}: {e}", "steps": 0, "timings": []}
+                finally:
+                    await session.release(page)
+
+                return {
+                    "id": item["id"],
+                    "task": item["task"],
+                    **outcome,
+                    "elapsed": round(time.perf_counter() - started, 3),
+                }
+
+        return await asyncio.gather(*(run_one(item) for item in tasks))
@@ -1,5 +1,6 @@
 from enum import Enum
 from pathlib import Path
+from typing import Optional
 
 from pydantic import BaseModel, Field, field_validator
 
@@ -14,6 +15,33 @@ class Browser(str, Enum):
     firefox = 'firefox'
 
 
+class Readiness(str, Enum):
+    networkidle = 'networkidle'
+    domcontentloaded = 'domcontentloaded'
+    mutation_quiet = 'mutation_quiet'
+    deadline = 'deadline'
+
+
+class PayloadMode(str, Enum):
+    full = 'full'
+    delta = 'delta'
+
+
+class ResourceType(str, Enum):
+    stylesheet = 'stylesheet'
+    image = 'image'
+    media = 'media'
+    font = 'font'
+    script = 'script'
+    texttrack = 'texttrack'
+    xhr = 'xhr'
+    fetch = 'fetch'
+    eventsource = 'eventsource'
+    websocket = 'websocket'
+    manifest = 'manifest'
+    other = 'other'
+
+
 class RunConfig(BaseModel):
     provider: Provider
     model: str
@@ -21,6 +49,26 @@ class RunConfig(BaseModel):
     profile_dir: Path
     max_steps: int = Field(..., gt=0)
     trace: bool
+    headless: bool = False
+    readiness: Readiness = Readiness.networkidle
+    readiness_timeout_ms: int = Field(30_000, gt=0)
+    quiet_window_ms: int = Field(500, gt=0)
+    incremental_snapshots: bool = True
+    viewport_only: bool = False
+    payload_mode: PayloadMode = PayloadMode.delta
+    token_budget: Optional[int] = Field(None, gt=0)
+    stream: bool = True
+    prefetch: bool = True
+    warm_interval_ms: int = Field(1_000, gt=0)
+    block_resources: list[ResourceType] = Field(default_factory=list)
+    block_domains: list[str] = Field(default_factory=list)
+    allow_domains: list[str] = Field(default_factory=list)
+    block_trackers: bool = False
+    http_cache: bool = False
+    http_cache_max_mb: int = Field(256, gt=0)
+    http_cache_ttl_s: int = Field(86_400, gt=0)
+    risk_rules: Optional[Path] = None
+    approval_policy: Optional[Path] = None
 
     @field_validator('model', mode='before')
     @classmethod
@@ -1,2 +1,2 @@
 from .console_singleton import Console
-from .user_io import CLIUserIO, CLIClarificationIO
+from .user_io import CLIUserIO, CLIClarificationIO, CLITaskIO, BatchClarificationIO
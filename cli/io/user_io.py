@@ -1,5 +1,6 @@
 from rich.text import Text
 
+from agent.approval import Confirmation
 from cli.io.console_singleton import Console
 from cli.ui.styles import STYLES
 
@@ -38,7 +39,46 @@ class CLIClarificationIO:
         return CLIUserIO().input()
 
     @staticmethod
-    def confirm(action_summary: str) -> bool:
+    def confirm(action_summary: str, allow_always: bool = False) -> Confirmation:
         console.print(Text(action_summary, style=STYLES.primary))
-        answer = console.input(Text("Proceed? [y/N]: ", style=STYLES.warning)).strip().lower()
-        return answer in ("y", "yes")
+        prompt = "Proceed? [y/N/a = always on this site]: " if allow_always else "Proceed? [y/N]: "
+        answer = console.input(Text(prompt, style=STYLES.warning)).strip().lower()
+        if allow_always and answer in ("a", "always"):
+            return Confirmation.always
+        if answer in ("y", "yes"):
+            return Confirmation.approve
+        return Confirmation.decline
+
+
+class CLITaskIO:
+    """
+    Слой вывода для задачи, выполняемой параллельно с другими.
+
+    Помечает каждое сообщение идентификатором задачи.
+    """
+    def __init__(self, task_id: str):
+        self.task_id = task_id
+
+    def print(self, action_summary: str) -> None:
+        console.print(Text.assemble(
+            (f'[{self.task_id}] ', STYLES.secondary),
+            (action_summary, STYLES.primary),
+        ))
+
+
+class BatchClarificationIO:
+    """
+    Слой подтверждений для пакетного режима, где пользователь не участвует.
+
+    Решение по подтверждениям, не покрытым политикой одобрений (RunConfig.approval_policy),
+    задаётся заранее (approve).
+    """
+    def __init__(self, approve: bool = False):
+        self.approve = approve
+
+    @staticmethod
+    def ask(question: str) -> str:
+        return ""
+
+    def confirm(self, action_summary: str, allow_always: bool = False) -> Confirmation:
+        return Confirmation.approve if self.approve else Confirmation.decline
@@ -1,5 +1,3 @@
-import asyncio
-
 from rich.text import Text
 
 from cli.io import Console
@@ -16,7 +14,7 @@ if TYPE_CHECKING:
 console = Console()
 
 
-def enter_api_key(cfg: 'RunConfig') -> None:
+async def enter_api_key(cfg: 'RunConfig') -> None:
     """Сценарий ввода API ключа"""
 
     console.print(Text(f"No API key found for {cfg.provider.name}.", style=STYLES.warning))
@@ -29,4 +27,4 @@ def enter_api_key(cfg: 'RunConfig') -> None:
         if not api_key:
             console.print(Text("API key cannot be empty. Try again.", style=STYLES.warning))
 
-    asyncio.run(ApiKey(name=cfg.provider, value=api_key).save())
+    await ApiKey(name=cfg.provider, value=api_key).save()
@@ -1 +1,2 @@
 from .api_key import ApiKey
+from .approval import Approval
@@ -0,0 +1,11 @@
+from orm.fields import IntegerField, TextField
+from orm.model import Model
+
+
+class Approval(Model):
+    """Модель для хранения одобренных пользователем действий («всегда на этом сайте»)."""
+    id = IntegerField(primary_key=True)
+    domain = TextField(index=True)
+    action_type = TextField()
+    context = TextField()
+    risk = TextField(default="confirm")  # наибольший одобренный уровень риска (ActionRisk)
@@ -1,45 +1,204 @@
-import aiosqlite
+import asyncio
 from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Iterable, Optional
+
+import aiosqlite
+
+
+DEFAULT_PRAGMAS: dict[str, Any] = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "cache_size": -16_000,  # в КиБ (~16 МБ на соединение)
+    "mmap_size": 128 * 1024 * 1024,
+    "temp_store": "MEMORY",
+    "busy_timeout": 5_000,
+}
 
 
 class Database:
     """
-    Обертка над aiosqlite.
-    Обеспечивает автоматическое управление соединением.
+    Обертка над aiosqlite с пулом долгоживущих соединений.
+
+    Соединения открываются лениво (не более pool_size), настраиваются PRAGMA-параметрами
+    (по умолчанию WAL и DEFAULT_PRAGMAS) и переиспользуются между запросами.
+    Каждое соединение хранит до statement_cache_size подготовленных запросов по тексту SQL,
+    поэтому одинаковые строки SQL (см. кэш в QuerySet) не компилируются повторно.
+    Вне транзакции каждый запрос фиксируется сразу (autocommit); transaction() объединяет
+    несколько запросов под одним COMMIT.
 
-    Не реализует пул соединений.
+    Пул привязан к event loop: при запуске в новом loop старые соединения закрываются.
     """
-    def __init__(self, path: str):
+    def __init__(
+            self,
+            path: str,
+            pool_size: int = 4,
+            pragmas: Optional[dict[str, Any]] = None,
+            statement_cache_size: int = 256,
+    ):
         self.path = path
+        self.pool_size = pool_size
+        self.statement_cache_size = statement_cache_size
+        self.pragmas = {**DEFAULT_PRAGMAS, **(pragmas or {})}
         self._initialized = False
 
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._connections: list[aiosqlite.Connection] = []
+        self._idle: list[aiosqlite.Connection] = []
+        self._transaction: ContextVar[Optional[aiosqlite.Connection]] = ContextVar(
+            f"transaction_{id(self)}", default=None,
+        )
+
+    async def _open(self) -> aiosqlite.Connection:
+        conn = await aiosqlite.connect(
+            self.path,
+            isolation_level=None,
+            cached_statements=self.statement_cache_size,
+        )
+        conn.row_factory = aiosqlite.Row
+        for name, value in self.pragmas.items():
+            await conn.execute(f"PRAGMA {name}={value}")
+        return conn
+
+    async def _bind_loop(self) -> None:
+        """Привязывает пул к текущему event loop, закрывая соединения предыдущего"""
+
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
+            return
+
+        stale = self._connections
+        self._loop = loop
+        self._slots = asyncio.Semaphore(self.pool_size)
+        self._connections, self._idle = [], []
+        for conn in stale:
+            await conn.close()
+
+    async def _acquire(self) -> aiosqlite.Connection:
+        await self._bind_loop()
+        await self._slots.acquire()
+        try:
+            if self._idle:
+                return self._idle.pop()
+
+            conn = await self._open()
+            self._connections.append(conn)
+            return conn
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def _release(self, conn: aiosqlite.Connection) -> None:
+        if conn in self._connections:
+            self._idle.append(conn)
+            self._slots.release()
+
     @asynccontextmanager
-    async def connect(self):
+    async def connection(self) -> AsyncIterator[aiosqlite.Connection]:
         """
-        Асинхронный контекстный менеджер соединения с БД.
+        Выдаёт соединение из пула на время блока.
 
-        Предназначен для краткоживущих операций.
+        Внутри transaction() возвращает соединение текущей транзакции.
         """
-        conn = await aiosqlite.connect(self.path)
-        conn.row_factory = aiosqlite.Row
+
+        current = self._transaction.get()
+        if current is not None:
+            yield current
+            return
+
+        conn = await self._acquire()
         try:
             yield conn
-            await conn.commit()
         finally:
-            await conn.close()
+            self._release(conn)
+
+    @asynccontextmanager
+    async def transaction(self) -> AsyncIterator[aiosqlite.Connection]:
+        """
+        Явная транзакция: все запросы блока выполняются на одном соединении
+        и фиксируются одним COMMIT (ROLLBACK при исключении).
 
-    async def execute(self, sql: str, params: tuple = ()):
-        """Выполняет SQL-запрос без возврата данных"""
+        Вложенный вызов присоединяется к внешней транзакции.
+        """
 
-        async with self.connect() as conn:
-            await conn.execute(sql, params)
+        current = self._transaction.get()
+        if current is not None:
+            yield current
+            return
+
+        conn = await self._acquire()
+        token = self._transaction.set(conn)
+        try:
+            await conn.execute("BEGIN")
+            try:
+                yield conn
+            except BaseException:
+                await conn.execute("ROLLBACK")
+                raise
+            await conn.execute("COMMIT")
+        finally:
+            self._transaction.reset(token)
+            self._release(conn)
+
+    def connect(self):
+        """
+        Асинхронный контекстный менеджер соединения с БД.
+
+        Сохранён для совместимости: эквивалентен transaction().
+        """
+
+        return self.transaction()
+
+    async def execute(self, sql: str, params: tuple = ()) -> aiosqlite.Cursor:
+        """
+        Выполняет SQL-запрос без возврата данных.
+
+        Возвращает курсор — для чтения lastrowid и rowcount.
+        """
+
+        async with self.connection() as conn:
+            return await conn.execute(sql, params)
+
+    async def executemany(self, sql: str, params_seq: Iterable[tuple]) -> aiosqlite.Cursor:
+        """Выполняет SQL-запрос для каждого набора параметров за одно обращение к драйверу"""
+
+        async with self.connection() as conn:
+            return await conn.executemany(sql, params_seq)
 
     async def fetchall(self, sql: str, params: tuple = ()):
         """Выполняет SQL-запрос и возвращает все строки результата"""
 
-        async with self.connect() as conn:
+        async with self.connection() as conn:
             cursor = await conn.execute(sql, params)
             return await cursor.fetchall()
 
+    async def iterate(self, sql: str, params: tuple = (), chunk_size: int = 100) -> AsyncIterator[aiosqlite.Row]:
+        """
+        Потоково перебирает строки результата по открытому курсору, загружая их порциями
+        по chunk_size (fetchmany).
+
+        Соединение занято до конца перебора (или закрытия генератора).
+        """
+
+        async with self.connection() as conn:
+            cursor = await conn.execute(sql, params)
+            try:
+                while rows := await cursor.fetchmany(chunk_size):
+                    for row in rows:
+                        yield row
+            finally:
+                # Брошенный генератор может быть финализирован уже после close() пула
+                if conn in self._connections:
+                    await cursor.close()
+
+    async def close(self) -> None:
+        """Закрывает все соединения пула"""
+
+        connections, self._connections, self._idle = self._connections, [], []
+        self._loop = None
+        for conn in connections:
+            await conn.close()
+
 
 db = Database("db.sqlite3")
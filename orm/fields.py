@@ -32,11 +32,27 @@ class BaseField(ABC):
 
 class Field(BaseField):
     """Базовый класс поля модели"""
-    def __init__(self, primary_key=False, null=False, default=None):
+    def __init__(self, primary_key=False, null=False, default=None, index=False, unique=False):
         super().__init__()
         self.primary_key = primary_key
         self.null = null
         self.default = default
+        self.index = index
+        self.unique = unique
+
+    def index_ddl(self, table: str) -> str | None:
+        """
+        Формирует CREATE INDEX для поля с index=True или unique=True.
+
+        Для первичного ключа и полей без индекса возвращает None.
+        """
+
+        if self.primary_key or not (self.index or self.unique):
+            return None
+
+        if self.unique:
+            return f"CREATE UNIQUE INDEX IF NOT EXISTS {table}_{self.name}_uniq ON {table} ({self.name})"
+        return f"CREATE INDEX IF NOT EXISTS {table}_{self.name}_idx ON {table} ({self.name})"
 
     def _render_default(self) -> str:
         """
@@ -0,0 +1,98 @@
+import hashlib
+import sqlite3
+from typing import TYPE_CHECKING, Iterable
+
+from orm.db import db
+
+if TYPE_CHECKING:
+    from orm.model import ModelMeta
+
+
+SCHEMA_TABLE = "_orm_schema"
+
+
+class MigrationError(RuntimeError):
+    """Изменение схемы нельзя применить добавлением столбцов"""
+
+
+def model_fingerprint(model: 'ModelMeta') -> str:
+    """Отпечаток схемы модели: таблица, DDL столбцов и индексов"""
+
+    parts = [model._table]
+    parts.extend(f"{field.name} {field.ddl()}" for field in model._fields.values())
+    parts.extend(model._index_ddl())
+    return hashlib.sha256("\n".join(parts).encode()).hexdigest()
+
+
+async def _stored_fingerprints() -> dict[str, str]:
+    try:
+        rows = await db.fetchall(f"SELECT table_name, fingerprint FROM {SCHEMA_TABLE}")
+    except sqlite3.OperationalError:  # таблицы метаданных ещё нет — первая инициализация
+        return {}
+    return {row[0]: row[1] for row in rows}
+
+
+async def _existing_columns(model: 'ModelMeta') -> set[str]:
+    rows = await db.fetchall(f"PRAGMA table_info({model._table})")
+    return {row["name"] for row in rows}
+
+
+async def _migrate_model(model: 'ModelMeta') -> None:
+    """
+    Приводит таблицу модели к текущему описанию полей.
+
+    Новая таблица создаётся целиком; в существующую добавляются недостающие столбцы
+    (ALTER TABLE ... ADD COLUMN) и индексы. Удалённые поля остаются в таблице.
+    """
+
+    existing = await _existing_columns(model)
+    if not existing:
+        await model._create_table()
+        return
+
+    for field in model._fields.values():
+        if field.name in existing:
+            continue
+        if field.primary_key:
+            raise MigrationError(f'Cannot add primary key "{field.name}" to existing table "{model._table}"')
+        if not field.null and field.default is None:
+            raise MigrationError(
+                f'Cannot add NOT NULL field "{field.name}" without default to existing table "{model._table}"'
+            )
+        await db.execute(f"ALTER TABLE {model._table} ADD COLUMN {field.name} {field.ddl()}")
+
+    for ddl in model._index_ddl():
+        await db.execute(ddl)
+
+
+async def migrate(models: Iterable['ModelMeta']) -> list['ModelMeta']:
+    """
+    Применяет изменения схемы для моделей, чей отпечаток отличается от сохранённого.
+
+    Если все отпечатки совпадают, выполняется только одно чтение таблицы метаданных.
+    Возвращает список мигрированных моделей.
+    """
+
+    models = list(models)
+    stored = await _stored_fingerprints()
+    pending = [
+        (model, fingerprint)
+        for model in models
+        if stored.get(model._table) != (fingerprint := model_fingerprint(model))
+    ]
+    if not pending:
+        return []
+
+    async with db.transaction():
+        await db.execute(
+            f"CREATE TABLE IF NOT EXISTS {SCHEMA_TABLE} (table_name TEXT PRIMARY KEY, fingerprint TEXT NOT NULL)"
+        )
+        for model, fingerprint in pending:
+            await _migrate_model(model)
+            await db.execute(
+                f"INSERT INTO {SCHEMA_TABLE} (table_name, fingerprint) VALUES (?, ?) "
+                f"ON CONFLICT(table_name) DO UPDATE SET fingerprint = excluded.fingerprint",
+                (model._table, fingerprint),
+            )
+
+    return [model for model, _ in pending]
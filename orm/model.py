@@ -1,9 +1,11 @@
 import importlib
 import pkgutil
+from functools import cache
 from typing import Iterable
 
 from orm.db import db
 from orm.fields import Field
+from orm.migrations import migrate
 from orm.query import QuerySet
 
 
@@ -53,11 +55,12 @@ async def init_models(package_name: str = "models") -> None:
     """
     Инициализирует ORM.
 
-    Последовательно выполняет autodiscover моделей и создаёт таблицы в базе данных.
+    Последовательно выполняет autodiscover моделей и применяет изменения схемы
+    (см. orm.migrations.migrate): при неизменной схеме DDL не выполняется.
     """
 
     autodiscover_models(package_name)
-    await create_tables()
+    await migrate(get_registered_models())
 
 
 class ModelMeta(type):
@@ -82,6 +85,9 @@ class ModelMeta(type):
                 attrs.pop(key)
 
         attrs["_fields"] = fields
+        attrs["_pk"] = pk = next((key for key, field in fields.items() if field.primary_key), None)
+        attrs["_columns"] = tuple(fields)
+        attrs["_insert_columns"] = tuple(key for key in fields if key != pk)  # без автоматического ключа
         attrs["_table"] = name.lower()
 
         cls = super().__new__(mcls, name, bases, attrs)
@@ -101,7 +107,7 @@ class Model(metaclass=ModelMeta):
 
     @classmethod
     async def _create_table(cls):
-        """Создаёт таблицу, если она не существует"""
+        """Создаёт таблицу и индексы полей, если они не существуют"""
 
         columns = []
         for field in cls._fields.values():
@@ -112,24 +118,61 @@ class Model(metaclass=ModelMeta):
             {", ".join(columns)}
         )
         """
-        await db.execute(sql)
+        async with db.transaction():
+            await db.execute(sql)
+            for ddl in cls._index_ddl():
+                await db.execute(ddl)
 
-    async def save(self):
-        """Сохраняет текущий экземпляр модели в базе данных"""
+    @classmethod
+    def _index_ddl(cls) -> list[str]:
+        """Возвращает CREATE INDEX для полей модели с index=True или unique=True"""
+
+        return [ddl for field in cls._fields.values() if (ddl := field.index_ddl(cls._table))]
+
+    @classmethod
+    @cache
+    def _insert_sql(cls, names: tuple[str, ...], upsert: bool = False) -> str:
+        """
+        Формирует INSERT для указанных столбцов (кэшируется по модели и набору столбцов).
+
+        При upsert=True конфликт по первичному ключу обновляет существующую строку.
+        """
+
+        sql = f"INSERT INTO {cls._table} ({", ".join(names)}) VALUES ({", ".join("?" for _ in names)})"
+        if upsert and cls._pk is not None:
+            updates = [f"{name} = excluded.{name}" for name in names if name != cls._pk]
+            if updates:
+                sql += f" ON CONFLICT({cls._pk}) DO UPDATE SET {", ".join(updates)}"
+            else:
+                sql += f" ON CONFLICT({cls._pk}) DO NOTHING"
+        return sql
+
+    def _column_values(self, names: tuple[str, ...]) -> tuple:
+        """Возвращает значения столбцов экземпляра с учётом default полей"""
 
-        fields = list(self._fields.keys())
         values = []
-        for name in fields:
+        for name in names:
             field = self._fields[name]
             value = getattr(self, name)
             if value is None and field.default is not None:
                 value = field.default() if callable(field.default) else field.default
             values.append(value)
-        values = tuple(values)
-        placeholders = ", ".join("?" for _ in fields)
+        return tuple(values)
 
-        sql = f"""
-        INSERT INTO {self._table} ({", ".join(fields)})
-        VALUES ({placeholders})
+    async def save(self):
         """
-        await db.execute(sql, values)
+        Сохраняет текущий экземпляр модели в базе данных.
+
+        Экземпляр без первичного ключа вставляется новой строкой и получает её ключ;
+        экземпляр с ключом вставляется или обновляет существующую строку (upsert).
+        """
+
+        pk = self._pk
+        if pk is not None and getattr(self, pk) is None:
+            names = self._insert_columns
+            cursor = await db.execute(self._insert_sql(names), self._column_values(names))
+            setattr(self, pk, cursor.lastrowid)
+            return
+
+        names = self._columns
+        await db.execute(self._insert_sql(names, upsert=True), self._column_values(names))
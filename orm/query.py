@@ -1,29 +1,174 @@
+from functools import lru_cache
+from itertools import batched
+
 from orm.db import db
 
-from typing import TYPE_CHECKING, Optional, AsyncGenerator
+from typing import TYPE_CHECKING, Iterable, Optional, AsyncGenerator
 
 if TYPE_CHECKING:
     from orm.model import ModelMeta
 
 
+# Суффиксы lookup-ов filter() → SQL-операторы
+_OPERATORS = {
+    "exact": "=",
+    "ne": "!=",
+    "gt": ">",
+    "gte": ">=",
+    "lt": "<",
+    "lte": "<=",
+    "like": "LIKE",
+}
+
+# Сгенерированный SQL по форме запроса: (модель, операция, условия WHERE, проекция, ...)
+_SQL_CACHE: dict[tuple, str] = {}
+_SQL_CACHE_SIZE = 1024
+
+
+@lru_cache(maxsize=1024)
+def _parse_lookup(key: str) -> tuple[str, str]:
+    """Разбирает ключ filter() на имя поля и lookup: "id__in" → ("id", "in")"""
+
+    name, _, lookup = key.partition("__")
+    return name, lookup or "exact"
+
+
 class QuerySet:
     """
     Ленивая асинхронная выборка объектов модели.
 
     Представляет собой описание запроса, а не результат его выполнения.
+
+    Результат выборки определяется режимом result:
+    - "model" — объекты модели (по умолчанию);
+    - "values" — словари {столбец: значение} (values());
+    - "values_list" / "flat" — кортежи или одиночные значения (values_list()).
     """
-    def __init__(self, model: 'ModelMeta', where: Optional[list] = None, params: Optional[list] = None):
+    def __init__(
+            self,
+            model: 'ModelMeta',
+            where: Optional[list] = None,
+            params: Optional[list] = None,
+            columns: Optional[tuple[str, ...]] = None,
+            result: str = "model",
+            ordering: Optional[tuple[str, ...]] = None,
+            limit: Optional[int] = None,
+            offset: int = 0,
+    ):
         self.model = model
-        self.where = list(where or [])
+        self.where = tuple(where or ())
         self.params = list(params or [])
+        self.columns = tuple(columns or ())
+        self.result = result
+        self.ordering = tuple(ordering or ())
+        self.limit = limit
+        self.offset = offset
+
+    def _clone(self, **changes) -> 'QuerySet':
+        """Копия выборки с изменёнными параметрами запроса"""
+
+        state = {
+            "where": self.where,
+            "params": self.params,
+            "columns": self.columns,
+            "result": self.result,
+            "ordering": self.ordering,
+            "limit": self.limit,
+            "offset": self.offset,
+        }
+        state.update(changes)
+        return QuerySet(self.model, **state)
+
+    def _check_field(self, name: str) -> str:
+        """Проверяет, что имя относится к полю модели (имена подставляются в SQL)"""
+
+        if name not in self.model._fields:
+            raise ValueError(f'Unknown field "{name}" for {self.model.__name__}')
+        return name
 
     def filter(self, **kwargs) -> 'QuerySet':
+        """
+        Сужает выборку условиями, объединёнными через AND.
+
+        Поддерживает суффиксы lookup-ов: __in, __gt, __gte, __lt, __lte, __ne, __like;
+        сравнение с None превращается в IS NULL.
+        """
+
         where = list(self.where)
         params = list(self.params)
-        for k, v in kwargs.items():
-            where.append(f"{k} = ?")
-            params.append(v)
-        return QuerySet(self.model, where=where, params=params)
+        for key, value in kwargs.items():
+            name, lookup = _parse_lookup(key)
+            self._check_field(name)
+
+            if lookup == "in":
+                values = list(value)
+                if not values:
+                    where.append("0")  # пустой IN не совпадает ни с одной строкой
+                    continue
+                where.append(f"{name} IN ({", ".join("?" for _ in values)})")
+                params.extend(values)
+            elif lookup == "exact" and value is None:
+                where.append(f"{name} IS NULL")
+            elif lookup in _OPERATORS:
+                where.append(f"{name} {_OPERATORS[lookup]} ?")
+                params.append(value)
+            else:
+                raise ValueError(f'Unsupported lookup "{lookup}"')
+        return self._clone(where=where, params=params)
+
+    def order_by(self, *fields: str) -> 'QuerySet':
+        """Задаёт сортировку; префикс "-" — по убыванию"""
+
+        for field in fields:
+            self._check_field(field.removeprefix("-"))
+        return self._clone(ordering=fields)
+
+    def only(self, *fields: str) -> 'QuerySet':
+        """Загружает объекты модели только с указанными полями (и первичным ключом)"""
+
+        columns = [self._check_field(field) for field in fields]
+        pk = self.model._pk
+        if pk is not None and pk not in columns:
+            columns.insert(0, pk)
+        return self._clone(columns=tuple(columns), result="model")
+
+    def __getitem__(self, item: slice) -> 'QuerySet':
+        """Срез выборки qs[offset:stop] → LIMIT/OFFSET"""
+
+        if not isinstance(item, slice) or item.step is not None:
+            raise TypeError("QuerySet supports only slices without step")
+
+        start = item.start or 0
+        if start < 0 or (item.stop is not None and item.stop < 0):
+            raise ValueError("Negative indexing is not supported")
+
+        offset = self.offset + start
+        limit = self.limit
+        if item.stop is not None:
+            stop = self.offset + item.stop
+            if limit is not None:
+                stop = min(stop, self.offset + limit)
+            limit = max(stop - offset, 0)
+        elif limit is not None:
+            limit = max(limit - start, 0)
+        return self._clone(limit=limit, offset=offset)
+
+    def values(self, *fields: str) -> 'QuerySet':
+        """Выборка словарей {столбец: значение} без создания объектов модели"""
+
+        return self._clone(columns=tuple(map(self._check_field, fields)), result="values")
+
+    def values_list(self, *fields: str, flat: bool = False) -> 'QuerySet':
+        """
+        Выборка кортежей значений без создания объектов модели.
+
+        При flat=True (ровно одно поле) возвращаются сами значения.
+        """
+
+        if flat and len(fields) != 1:
+            raise ValueError("flat=True requires exactly one field")
+        columns = tuple(map(self._check_field, fields))
+        return self._clone(columns=columns, result="flat" if flat else "values_list")
 
     def _where_clause(self) -> str:
         """Формирует SQL-фрагмент WHERE для текущей выборки"""
@@ -32,39 +177,175 @@ class QuerySet:
             return "WHERE " + " AND ".join(self.where)
         return ""
 
-    async def all(self) -> list:
+    def _order_clause(self) -> str:
+        """Формирует SQL-фрагмент ORDER BY для текущей выборки"""
+
+        if not self.ordering:
+            return ""
+        terms = [
+            f"{field[1:]} DESC" if field.startswith("-") else f"{field} ASC"
+            for field in self.ordering
+        ]
+        return "ORDER BY " + ", ".join(terms)
+
+    def _limit_clause(self) -> str:
+        """Формирует SQL-фрагмент LIMIT/OFFSET для текущей выборки"""
+
+        if self.limit is None and not self.offset:
+            return ""
+        limit = -1 if self.limit is None else self.limit
+        return f"LIMIT {limit} OFFSET {self.offset}"
+
+    def _select_sql(self, columns: Optional[str] = None) -> str:
+        """Формирует SELECT для текущей выборки"""
+
+        columns = columns or (", ".join(self.columns) if self.columns else "*")
         where = self._where_clause()
-        sql = f"SELECT * FROM {self.model._table} {where}"
-        rows = await db.fetchall(sql, tuple(self.params))
-        return [self.model(**dict(r)) for r in rows]
+        order = self._order_clause()
+        limit = self._limit_clause()
+        return f"SELECT {columns} FROM {self.model._table} {where} {order} {limit}"
 
-    def __aiter__(self) -> AsyncGenerator:
-        """Поддержка асинхронной итерации по результатам выборки"""
+    def _sql(self, operation: str, *extra: str) -> str:
+        """
+        Возвращает SQL операции над выборкой из кэша по форме запроса.
+
+        Параметры запроса в ключ не входят, поэтому повторные запросы одной формы
+        (например, filter(name=...) с разными значениями) получают одну и ту же строку SQL,
+        а соединения пула переиспользуют для неё подготовленный запрос.
+        """
+
+        key = (self.model, operation, extra, self.where, self.columns, self.ordering, self.limit, self.offset)
+        sql = _SQL_CACHE.get(key)
+        if sql is None:
+            if len(_SQL_CACHE) >= _SQL_CACHE_SIZE:
+                _SQL_CACHE.clear()
+            sql = _SQL_CACHE[key] = self._build_sql(operation, *extra)
+        return sql
+
+    def _build_sql(self, operation: str, *extra: str) -> str:
+        table = self.model._table
+        where = self._where_clause()
+        match operation:
+            case "select":
+                return self._select_sql()
+            case "exists":
+                return self[:1]._select_sql("1")
+            case "count" if self.limit is not None or self.offset:
+                return f"SELECT COUNT(*) FROM ({self._select_sql('1')})"
+            case "count":
+                return f"SELECT COUNT(*) FROM {table} {where}"
+            case "update":
+                assignments = ", ".join(f"{name} = ?" for name in extra)
+                return f"UPDATE {table} SET {assignments} {where}"
+            case "delete":
+                return f"DELETE FROM {table} {where}"
+        raise ValueError(f'Unknown operation "{operation}"')
 
-        async def gen():
-            for obj in await self.all():
-                yield obj
+    def _check_unsliced(self, operation: str) -> None:
+        if self.limit is not None or self.offset:
+            raise ValueError(f"Cannot {operation} a sliced QuerySet")
 
-        return gen()
+    def _convert(self, row):
+        """Преобразует строку результата согласно режиму выборки"""
+
+        match self.result:
+            case "values":
+                return dict(row)
+            case "values_list":
+                return tuple(row)
+            case "flat":
+                return row[0]
+            case _:
+                return self.model(**dict(row))
+
+    async def all(self) -> list:
+        rows = await db.fetchall(self._sql("select"), self.params)
+        return [self._convert(r) for r in rows]
+
+    async def iterator(self, chunk_size: int = 100) -> AsyncGenerator:
+        """
+        Потоково перебирает результаты выборки по открытому курсору.
+
+        Строки загружаются порциями по chunk_size, поэтому память не растёт
+        с размером таблицы.
+        """
+
+        async for row in db.iterate(self._sql("select"), self.params, chunk_size):
+            yield self._convert(row)
+
+    def __aiter__(self) -> AsyncGenerator:
+        """Поддержка асинхронной итерации по результатам выборки (потоково, см. iterator)"""
+
+        return self.iterator()
 
     async def get(self, **kwargs) -> ModelMeta:
         qs = self.filter(**kwargs)
-        where = qs._where_clause()
-        sql = f"SELECT * FROM {qs.model._table} {where} LIMIT 2"
-        rows = await db.fetchall(sql, tuple(qs.params))
+        rows = await db.fetchall(qs[:2]._sql("select"), qs.params)
         if not rows:
             raise ValueError("Object does not exist")
         if len(rows) > 1:
             raise ValueError("Multiple objects returned")
-        return qs.model(**dict(rows[0]))
+        return qs._convert(rows[0])
+
+    async def count(self) -> int:
+        """Количество объектов выборки, посчитанное в SQL"""
+
+        rows = await db.fetchall(self._sql("count"), self.params)
+        return rows[0][0]
+
+    async def bulk_create(self, objs: Iterable, batch_size: int = 500) -> list:
+        """
+        Вставляет объекты пакетами по batch_size (executemany) в одной транзакции.
+
+        Объекты без первичного ключа получают ключи вставленных строк
+        (для целочисленного первичного ключа).
+        """
+
+        objs = list(objs)
+        model = self.model
+        pk = model._pk
+        generated = [obj for obj in objs if pk is not None and getattr(obj, pk) is None]
+        explicit = [obj for obj in objs if pk is None or getattr(obj, pk) is not None]
+
+        async with db.transaction():
+            if explicit:
+                names = model._columns
+                sql = model._insert_sql(names)
+                for batch in batched(explicit, batch_size):
+                    await db.executemany(sql, [obj._column_values(names) for obj in batch])
+
+            if generated:
+                names = model._insert_columns
+                sql = model._insert_sql(names)
+                assign_keys = model._fields[pk].sql_type == "INTEGER"
+                for batch in batched(generated, batch_size):
+                    await db.executemany(sql, [obj._column_values(names) for obj in batch])
+                    if not assign_keys:
+                        continue
+
+                    # Внутри транзакции строки пакета получают последовательные rowid
+                    rows = await db.fetchall("SELECT last_insert_rowid()")
+                    first = rows[0][0] - len(batch) + 1
+                    for offset, obj in enumerate(batch):
+                        setattr(obj, pk, first + offset)
+
+        return objs
+
+    async def update(self, **fields) -> int:
+        """Обновляет поля всех объектов выборки одним запросом; возвращает число строк"""
+
+        self._check_unsliced("update")
+        if not fields:
+            return 0
+
+        sql = self._sql("update", *map(self._check_field, fields))
+        cursor = await db.execute(sql, (*fields.values(), *self.params))
+        return cursor.rowcount
 
     async def delete(self):
-        where = self._where_clause()
-        sql = f"DELETE FROM {self.model._table} {where}"
-        await db.execute(sql, tuple(self.params))
+        self._check_unsliced("delete")
+        await db.execute(self._sql("delete"), self.params)
 
     async def exists(self) -> bool:
-        where = self._where_clause()
-        sql = f"SELECT 1 FROM {self.model._table} {where} LIMIT 1"
-        rows = await db.fetchall(sql, tuple(self.params))
+        rows = await db.fetchall(self._sql("exists"), self.params)
         return len(rows) > 0
@@ -0,0 +1,27 @@
+import asyncio
+
+import pytest
+
+from orm.db import db
+
+
+@pytest.fixture
+def run(tmp_path, monkeypatch):
+    """
+    Выполняет корутину на временной БД.
+
+    Пул соединений привязан к event loop, поэтому он закрывается в том же loop.
+    """
+
+    monkeypatch.setattr(db, "path", str(tmp_path / "test.sqlite3"))
+
+    def runner(scenario):
+        async def main():
+            try:
+                return await scenario()
+            finally:
+                await db.close()
+
+        return asyncio.run(main())
+
+    return runner
@@ -0,0 +1,173 @@
+import pytest
+
+from orm.db import db
+from orm.fields import IntegerField, TextField
+from orm.migrations import SCHEMA_TABLE, MigrationError, migrate
+from orm.model import Model
+
+
+class Note(Model):
+    id = IntegerField(primary_key=True)
+    title = TextField(index=True)
+    rank = IntegerField(default=0)
+    body = TextField(null=True)
+
+
+class Tag(Model):
+    name = TextField(primary_key=True)
+    weight = IntegerField(default=1)
+
+
+async def _columns(table: str) -> list[str]:
+    return [row["name"] for row in await db.fetchall(f"PRAGMA table_info({table})")]
+
+
+async def _indexes(table: str) -> set[str]:
+    return {row["name"] for row in await db.fetchall(f"PRAGMA index_list({table})")}
+
+
+async def _seed() -> list[Note]:
+    await migrate([Note])
+    return await Note.objects.bulk_create(
+        Note(title=f"note {i}", rank=i % 3, body=None if i % 2 else f"body {i}") for i in range(10)
+    )
+
+
+def test_migrate_creates_tables_and_skips_unchanged_schema(run):
+    async def scenario():
+        assert await migrate([Note, Tag]) == [Note, Tag]
+        assert await _columns("note") == ["id", "title", "rank", "body"]
+        assert "note_title_idx" in await _indexes("note")
+        assert await migrate([Note, Tag]) == []
+
+    run(scenario)
+
+
+def test_migrate_adds_columns_to_pre_series_table(run):
+    async def scenario():
+        # Таблица из версии до миграций: без новых столбцов и без таблицы метаданных
+        await db.execute("CREATE TABLE note (id INTEGER PRIMARY KEY AUTOINCREMENT, title TEXT NOT NULL)")
+        await db.execute("INSERT INTO note (title) VALUES ('legacy')")
+
+        assert await migrate([Note]) == [Note]
+        assert await _columns("note") == ["id", "title", "rank", "body"]
+        assert "note_title_idx" in await _indexes("note")
+        assert [tuple(row) for row in await db.fetchall(f"SELECT table_name FROM {SCHEMA_TABLE}")] == [("note",)]
+
+        legacy = await Note.objects.get(title="legacy")
+        assert (legacy.id, legacy.rank, legacy.body) == (1, 0, None)
+
+    run(scenario)
+
+
+def test_migrate_rejects_not_null_column_without_default(run):
+    class Strict(Model):
+        id = IntegerField(primary_key=True)
+        code = TextField()
+
+    async def scenario():
+        await db.execute("CREATE TABLE strict (id INTEGER PRIMARY KEY AUTOINCREMENT)")
+        with pytest.raises(MigrationError):
+            await migrate([Strict])
+        # Неудавшаяся миграция не сохраняет отпечаток схемы
+        assert await db.fetchall(f"SELECT name FROM sqlite_master WHERE name = '{SCHEMA_TABLE}'") == []
+
+    run(scenario)
+
+
+def test_filter_lookups(run):
+    async def scenario():
+        await _seed()
+        titles = Note.objects.values_list("title", flat=True)
+
+        assert await titles.filter(rank=1).order_by("id").all() == ["note 1", "note 4", "note 7"]
+        assert await titles.filter(id__in=[2, 5]).order_by("id").all() == ["note 1", "note 4"]
+        assert await titles.filter(id__in=[]).all() == []
+        assert await titles.filter(id__gt=8).all() == ["note 8", "note 9"]
+        assert await titles.filter(id__lte=2, rank__ne=0).all() == ["note 1"]
+        assert await titles.filter(title__like="note 1%").all() == ["note 1"]
+        assert await Note.objects.filter(body=None).count() == 5
+
+        with pytest.raises(ValueError):
+            Note.objects.filter(missing=1)
+        with pytest.raises(ValueError):
+            Note.objects.filter(rank__between=1)
+
+    run(scenario)
+
+
+def test_ordering_slicing_and_projections(run):
+    async def scenario():
+        await _seed()
+        ordered = Note.objects.order_by("-rank", "id")
+
+        assert await ordered.values_list("id", flat=True).all() == [3, 6, 9, 2, 5, 8, 1, 4, 7, 10]
+        assert await ordered[2:5].values_list("id", flat=True).all() == [9, 2, 5]
+        assert await ordered[2:5][1:].values_list("id", flat=True).all() == [2, 5]
+        assert await ordered[8:].count() == 2
+        assert await ordered[20:].exists() is False
+
+        assert await Note.objects.filter(id=1).values("title", "rank").all() == [{"title": "note 0", "rank": 0}]
+        assert await Note.objects.filter(id=2).values_list("title", "rank").all() == [("note 1", 1)]
+
+        partial = (await Note.objects.filter(id=3).only("title").all())[0]
+        assert (partial.id, partial.title, partial.rank) == (3, "note 2", None)
+
+        assert [note.id async for note in Note.objects.filter(rank=0).order_by("id")] == [1, 4, 7, 10]
+
+        with pytest.raises(ValueError):
+            await ordered[:2].update(rank=0)
+
+    run(scenario)
+
+
+def test_update_and_delete(run):
+    async def scenario():
+        await _seed()
+
+        assert await Note.objects.filter(rank=2).update(body="updated") == 3
+        assert await Note.objects.filter(body="updated").count() == 3
+
+        await Note.objects.filter(rank__in=[1, 2]).delete()
+        assert await Note.objects.values_list("rank", flat=True).all() == [0, 0, 0, 0]
+
+    run(scenario)
+
+
+def test_bulk_create_assigns_integer_keys(run):
+    async def scenario():
+        await migrate([Note, Tag])
+        await Note(title="first").save()
+
+        notes = [Note(title=f"bulk {i}") for i in range(5)] + [Note(id=100, title="explicit")]
+        await Note.objects.bulk_create(notes, batch_size=2)
+
+        stored = dict(await Note.objects.values_list("title", "id").all())
+        assert len(stored) == 7
+        assert {note.title: note.id for note in notes} == {title: pk for title, pk in stored.items() if title != "first"}
+        assert notes[-1].id == 100
+
+        tags = await Tag.objects.bulk_create([Tag(name="a"), Tag(name="b", weight=5)])
+        assert [tag.name for tag in tags] == ["a", "b"]
+        assert await Tag.objects.order_by("name").values_list("weight", flat=True).all() == [1, 5]
+
+    run(scenario)
+
+
+def test_save_inserts_then_upserts(run):
+    async def scenario():
+        await migrate([Note, Tag])
+
+        note = Note(title="draft")
+        await note.save()
+        assert note.id == 1
+
+        note.title = "published"
+        await note.save()
+        assert await Note.objects.values_list("id", "title").all() == [(1, "published")]
+
+        await Tag(name="x", weight=2).save()
+        await Tag(name="x", weight=3).save()
+        assert await Tag.objects.values_list("name", "weight").all() == [("x", 3)]
+
+    run(scenario)
@@ -0,0 +1,60 @@
+import random
+from typing import Iterable, Optional
+
+import pytest
+
+from agent.navigator.actions.risk import KeywordMatcher, _normalize
+from agent.navigator.actions.risk_rules import DEFAULT_RULES_PATH, RiskRules
+from agent.navigator.actions.structures import ActionRisk
+
+
+def _match_per_keyword(categories: dict[ActionRisk, Iterable[str]], text: str) -> Optional[ActionRisk]:
+    """Прежняя реализация: поиск подстроки по каждому ключевому слову, категории по приоритету"""
+
+    for risk, keywords in categories.items():
+        if any(_normalize(keyword) in text for keyword in keywords if keyword.strip()):
+            return risk
+    return None
+
+
+DEFAULT_KEYWORDS = RiskRules.load(DEFAULT_RULES_PATH).keywords
+
+# Ключевые слова, вложенные друг в друга и пересекающиеся между категориями
+OVERLAPPING_KEYWORDS = {
+    ActionRisk.destructive: ("cancel subscription", "remove all"),
+    ActionRisk.confirm: ("cancel", "subscription", "all", "move"),
+    ActionRisk.safe: ("sub", "can", "ll", "  "),
+}
+
+
+def _texts(categories: dict[ActionRisk, Iterable[str]], count: int = 500) -> list[str]:
+    keywords = [_normalize(keyword) for words in categories.values() for keyword in words if keyword.strip()]
+    filler = ["", "the", "my", "account", "page", "now", "x", "-", "ok"]
+    rng = random.Random(0)
+
+    texts = ["", "nothing to see here", *keywords]
+    for _ in range(count):
+        parts = rng.sample(keywords, k=rng.randint(1, 3)) + rng.sample(filler, k=2)
+        rng.shuffle(parts)
+        text = " ".join(part for part in parts if part)
+        # Обрезка по случайной границе даёт неполные ключевые слова и их пересечения
+        start = rng.randint(0, len(text) // 3)
+        texts.append(_normalize(text[start:]))
+    return texts
+
+
+@pytest.mark.parametrize("categories", [DEFAULT_KEYWORDS, OVERLAPPING_KEYWORDS], ids=["default", "overlapping"])
+def test_keyword_matcher_matches_per_keyword_search(categories):
+    matcher = KeywordMatcher(categories)
+    for text in _texts(categories):
+        assert matcher.match(text) == _match_per_keyword(categories, text), text
+
+
+def test_keyword_matcher_prefers_category_order_over_position():
+    matcher = KeywordMatcher(OVERLAPPING_KEYWORDS)
+
+    assert matcher.match("can i cancel subscription") == ActionRisk.destructive
+    assert matcher.match("subscription") == ActionRisk.confirm
+    assert matcher.match("sub") == ActionRisk.safe
+    assert matcher.match("other") is None
+    assert KeywordMatcher({ActionRisk.safe: ()}).match("anything") is None